@@ -5,16 +5,83 @@ SQLite database for tracking all classification results and HITL activities
 import sqlite3
 import json
 import time
+import logging
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime
 
 from .config import Config
 
+logger = logging.getLogger(__name__)
+
+# Shared compact encoder for audit event payloads; json.dumps with non-default
+# arguments would build a new JSONEncoder on every call
+_encode_event_data = json.JSONEncoder(separators=(',', ':')).encode
+
 
 class AuditLogger:
     """Manages audit logs in SQLite database"""
 
+    # Buffered audit events are written once this many are pending
+    EVENT_BATCH_SIZE = 64
+
+    # Events for documents that are not classified yet are held for their
+    # classification; beyond this many the oldest are dropped
+    MAX_HELD_EVENTS = 1024
+
+    # Rows fetched per round-trip when streaming an export
+    EXPORT_BATCH_SIZE = 500
+
+    # Columns callers may project from the classifications table
+    CLASSIFICATION_COLUMNS = frozenset({
+        'id', 'document_id', 'file_name', 'final_category', 'confidence_score',
+        'reasoning_summary', 'citation_snippet', 'hitl_status', 'validation_consensus',
+        'dual_validation_pass1', 'dual_validation_pass2', 'blockchain_tx_hash',
+        'blockchain_audit_hash', 'audio_summary_path', 'processing_time_seconds',
+        'created_at', 'updated_at'
+    })
+
+    # Tables whose rows belong to a classification; replacing or deleting the
+    # classification removes them through ON DELETE CASCADE
+    _CHILD_TABLES = {
+        'hitl_reviews': """
+            CREATE TABLE IF NOT EXISTS hitl_reviews (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                document_id TEXT NOT NULL,
+                reviewer_name TEXT,
+                original_category TEXT NOT NULL,
+                corrected_category TEXT NOT NULL,
+                reviewer_notes TEXT,
+                reviewed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (document_id) REFERENCES classifications(document_id) ON DELETE CASCADE
+            )
+        """,
+        'audit_events': """
+            CREATE TABLE IF NOT EXISTS audit_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                document_id TEXT NOT NULL,
+                event_type TEXT NOT NULL,
+                event_data TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (document_id) REFERENCES classifications(document_id) ON DELETE CASCADE
+            )
+        """,
+        'chat_history': """
+            CREATE TABLE IF NOT EXISTS chat_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                document_id TEXT,
+                role TEXT NOT NULL,
+                message TEXT NOT NULL,
+                context_used TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (document_id) REFERENCES classifications(document_id) ON DELETE CASCADE
+            )
+        """,
+    }
+
     def __init__(self, db_path: Optional[Path] = None):
         """
         Initialize audit logger
@@ -24,12 +91,25 @@ class AuditLogger:
         """
         self.db_path = db_path or Config.DATABASE_PATH
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Single long-lived connection shared by all methods (serialized by the lock)
+        self._lock = threading.Lock()
+        # A larger prepared-statement cache keeps every AuditLogger statement compiled
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None,
+                                     cached_statements=256)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        self._conn.execute("PRAGMA mmap_size=268435456")
+
+        # Audit events waiting to be written with a single executemany
+        self._event_buffer: List[tuple] = []
+
         self._init_database()
 
     def _init_database(self):
         """Initialize database schema"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._conn.cursor()
 
         # Classifications table
         cursor.execute("""
@@ -54,32 +134,6 @@ class AuditLogger:
             )
         """)
 
-        # HITL Reviews table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS hitl_reviews (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                document_id TEXT NOT NULL,
-                reviewer_name TEXT,
-                original_category TEXT NOT NULL,
-                corrected_category TEXT NOT NULL,
-                reviewer_notes TEXT,
-                reviewed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (document_id) REFERENCES classifications(document_id)
-            )
-        """)
-
-        # Audit Events table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS audit_events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                document_id TEXT NOT NULL,
-                event_type TEXT NOT NULL,
-                event_data TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (document_id) REFERENCES classifications(document_id)
-            )
-        """)
-
         # Performance Metrics table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS performance_metrics (
@@ -91,30 +145,99 @@ class AuditLogger:
             )
         """)
 
-        # Chat History table for document Q&A
+        # HITL Reviews, Audit Events and Chat History tables
+        for create_sql in self._CHILD_TABLES.values():
+            cursor.execute(create_sql)
+
+        # Databases created before ON DELETE CASCADE was declared need their child tables rebuilt
+        self._migrate_cascade_foreign_keys(cursor)
+
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS chat_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT NOT NULL,
-                document_id TEXT,
-                role TEXT NOT NULL,
-                message TEXT NOT NULL,
-                context_used TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (document_id) REFERENCES classifications(document_id)
-            )
+            SELECT COUNT(*) FROM sqlite_master
+            WHERE type = 'index' AND name IN ('idx_hitl_pending', 'idx_chat_session_created')
         """)
+        composite_indexes_exist = cursor.fetchone()[0] == 2
 
         # Create indexes
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_document_id ON classifications(document_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_hitl_status ON classifications(hitl_status)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_category ON classifications(final_category)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_created_at ON classifications(created_at)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_session_id ON chat_history(session_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_chat_document_id ON chat_history(document_id)")
 
-        conn.commit()
-        conn.close()
+        # Composite indexes serve the status / session filter and its ORDER BY in one
+        # range scan; they supersede the single-column indexes on the same leading column
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_hitl_pending ON classifications(hitl_status, created_at DESC)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_chat_session_created ON chat_history(session_id, created_at)")
+        cursor.execute("DROP INDEX IF EXISTS idx_hitl_status")
+        cursor.execute("DROP INDEX IF EXISTS idx_session_id")
+
+        # Refresh planner statistics once so existing databases pick up the new indexes
+        if not composite_indexes_exist:
+            cursor.execute("ANALYZE")
+
+        # Replacing or deleting a classification cascades to its child rows
+        cursor.execute("PRAGMA foreign_keys = ON")
+
+    def _migrate_cascade_foreign_keys(self, cursor):
+        """Rebuild child tables whose foreign key to classifications lacks ON DELETE CASCADE"""
+        for table, create_sql in self._CHILD_TABLES.items():
+            foreign_keys = cursor.execute(f"PRAGMA foreign_key_list({table})").fetchall()
+            if all(fk[6] == 'CASCADE' for fk in foreign_keys):
+                continue
+
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+                cursor.execute(create_sql)
+
+                columns = cursor.execute(f"PRAGMA table_info({table}_old)").fetchall()
+                names = ", ".join(col[1] for col in columns)
+                document_id_required = any(col[1] == 'document_id' and col[3] for col in columns)
+
+                # Orphaned rows cannot satisfy the enforced foreign key: drop them when
+                # document_id is required, otherwise detach them from the missing document
+                if document_id_required:
+                    cursor.execute(f"""
+                        INSERT INTO {table} ({names})
+                        SELECT {names} FROM {table}_old
+                        WHERE document_id IN (SELECT document_id FROM classifications)
+                    """)
+                else:
+                    selected = ", ".join(
+                        "CASE WHEN document_id IN (SELECT document_id FROM classifications) "
+                        "THEN document_id END" if col[1] == 'document_id' else col[1]
+                        for col in columns
+                    )
+                    cursor.execute(f"INSERT INTO {table} ({names}) SELECT {selected} FROM {table}_old")
+
+                cursor.execute(f"DROP TABLE {table}_old")
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+
+    def close(self):
+        """Flush buffered audit events and close the underlying database connection"""
+        self.flush_events()
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """Run a block of statements as a single transaction (one commit, one fsync)"""
+        with self._lock:
+            # Events flushed in a transaction that rolls back go back in the buffer
+            buffered = list(self._event_buffer)
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+                cursor.execute("COMMIT")
+            except BaseException:
+                if self._conn.in_transaction:
+                    cursor.execute("ROLLBACK")
+                self._event_buffer[:] = buffered
+                raise
 
     def log_classification(self, classification_result: Dict, processing_time: float,
                           blockchain_record: Optional[Dict] = None,
@@ -122,17 +245,8 @@ class AuditLogger:
         """
         Log a classification result. Uses INSERT OR REPLACE to handle re-processing.
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
         document_id = classification_result['document_id']
 
-        # To maintain data integrity, first delete related records if we are about to replace a classification
-        # This is necessary because INSERT OR REPLACE only works on the 'classifications' table
-        cursor.execute("DELETE FROM hitl_reviews WHERE document_id = ?", (document_id,))
-        cursor.execute("DELETE FROM audit_events WHERE document_id = ?", (document_id,))
-        cursor.execute("DELETE FROM chat_history WHERE document_id = ?", (document_id,))
-
         # Extract dual validation data
         dual_val_data = classification_result.get('dual_validation_results', {})
         pass1_confidence = None
@@ -144,42 +258,46 @@ class AuditLogger:
             if 'pass2' in dual_val_data:
                 pass2_confidence = dual_val_data['pass2'] if isinstance(dual_val_data['pass2'], (int, float)) else dual_val_data['pass2'].get('confidence')
 
-        cursor.execute("""
-            INSERT OR REPLACE INTO classifications (
-                document_id, file_name, final_category, confidence_score,
-                reasoning_summary, citation_snippet, hitl_status,
-                validation_consensus, dual_validation_pass1, dual_validation_pass2,
-                blockchain_tx_hash, blockchain_audit_hash, audio_summary_path,
-                processing_time_seconds, updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """, (
-            document_id,
-            classification_result.get('file_name', 'unknown'),
-            classification_result['final_category'],
-            classification_result['confidence_score'],
-            classification_result['reasoning_summary'],
-            classification_result['citation_snippet'],
-            classification_result.get('hitl_status', 'PENDING'),
-            classification_result.get('validation_consensus'),
-            pass1_confidence,
-            pass2_confidence,
-            blockchain_record.get('transaction_hash') if blockchain_record else None,
-            blockchain_record.get('audit_hash') if blockchain_record else None,
-            audio_path,
-            processing_time
-        ))
-
-        record_id = cursor.lastrowid
-
-        # Log audit event
-        self._log_event(cursor, document_id, 'CLASSIFICATION_COMPLETED', {
+        # Serialize the audit event before taking the database lock
+        event_data = _encode_event_data({
             'category': classification_result['final_category'],
             'confidence': classification_result['confidence_score'],
             'hitl_status': classification_result.get('hitl_status')
         })
 
-        conn.commit()
-        conn.close()
+        with self._transaction() as cursor:
+            # Replacing an existing classification deletes its row first, which cascades
+            # to the related HITL reviews, audit events and chat history
+            cursor.execute("""
+                INSERT OR REPLACE INTO classifications (
+                    document_id, file_name, final_category, confidence_score,
+                    reasoning_summary, citation_snippet, hitl_status,
+                    validation_consensus, dual_validation_pass1, dual_validation_pass2,
+                    blockchain_tx_hash, blockchain_audit_hash, audio_summary_path,
+                    processing_time_seconds, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, (
+                document_id,
+                classification_result.get('file_name', 'unknown'),
+                classification_result['final_category'],
+                classification_result['confidence_score'],
+                classification_result['reasoning_summary'],
+                classification_result['citation_snippet'],
+                classification_result.get('hitl_status', 'PENDING'),
+                classification_result.get('validation_consensus'),
+                pass1_confidence,
+                pass2_confidence,
+                blockchain_record.get('transaction_hash') if blockchain_record else None,
+                blockchain_record.get('audit_hash') if blockchain_record else None,
+                audio_path,
+                processing_time
+            ))
+
+            record_id = cursor.lastrowid
+
+            # Log audit event, then write it together with this document's buffered events
+            self._log_event(document_id, 'CLASSIFICATION_COMPLETED', event_data)
+            self._flush_events(cursor, document_id)
 
         return record_id
 
@@ -199,157 +317,279 @@ class AuditLogger:
         Returns:
             Review ID
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO hitl_reviews (
-                document_id, reviewer_name, original_category,
-                corrected_category, reviewer_notes
-            ) VALUES (?, ?, ?, ?, ?)
-        """, (document_id, reviewer_name, original_category, corrected_category, notes))
-
-        review_id = cursor.lastrowid
-
-        # Update classification record
-        cursor.execute("""
-            UPDATE classifications
-            SET hitl_status = 'REVIEWED',
-                final_category = ?,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE document_id = ?
-        """, (corrected_category, document_id))
-
-        # Log audit event
-        self._log_event(cursor, document_id, 'HITL_REVIEW_COMPLETED', {
+        event_data = _encode_event_data({
             'original': original_category,
             'corrected': corrected_category,
             'reviewer': reviewer_name
         })
 
-        conn.commit()
-        conn.close()
+        with self._transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO hitl_reviews (
+                    document_id, reviewer_name, original_category,
+                    corrected_category, reviewer_notes
+                ) VALUES (?, ?, ?, ?, ?)
+            """, (document_id, reviewer_name, original_category, corrected_category, notes))
+
+            review_id = cursor.lastrowid
+
+            # Update classification record
+            cursor.execute("""
+                UPDATE classifications
+                SET hitl_status = 'REVIEWED',
+                    final_category = ?,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE document_id = ?
+            """, (corrected_category, document_id))
+
+            # Log audit event
+            self._log_event(document_id, 'HITL_REVIEW_COMPLETED', event_data)
+            self._flush_events(cursor, document_id)
 
         return review_id
 
-    def _log_event(self, cursor, document_id: str, event_type: str, event_data: Dict):
-        """Log an audit event"""
-        cursor.execute("""
-            INSERT INTO audit_events (document_id, event_type, event_data)
-            VALUES (?, ?, ?)
-        """, (document_id, event_type, json.dumps(event_data)))
+    def log_event(self, document_id: str, event_type: str, event_data: Dict):
+        """
+        Buffer an audit event for a document
 
-    def get_classification(self, document_id: str) -> Optional[Dict]:
-        """Get classification by document ID"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        Events are written in batches of EVENT_BATCH_SIZE, when the document's
+        classification is logged, or on flush_events(), whichever comes first;
+        events for a document that is not classified yet wait for its
+        classification.
 
-        cursor.execute("SELECT * FROM classifications WHERE document_id = ?", (document_id,))
-        row = cursor.fetchone()
+        Args:
+            document_id: Document identifier
+            event_type: Event type (e.g. BLOCKCHAIN_RECORDED)
+            event_data: JSON-serializable event details
+        """
+        encoded = _encode_event_data(event_data)
 
-        conn.close()
+        with self._lock:
+            self._log_event(document_id, event_type, encoded)
+            pending = len(self._event_buffer)
 
-        if row:
-            return dict(row)
-        return None
+        # Held events for unclassified documents stay in the buffer, so count
+        # whole batches rather than retrying on every later event
+        if pending % self.EVENT_BATCH_SIZE == 0:
+            self.flush_events()
 
-    def get_pending_hitl_reviews(self) -> List[Dict]:
-        """Get all classifications requiring HITL review"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+    def flush_events(self):
+        """Write the buffered audit events of classified documents in one transaction"""
+        with self._transaction() as cursor:
+            self._flush_events(cursor)
 
-        cursor.execute("""
-            SELECT * FROM classifications
-            WHERE hitl_status = 'REQUIRES_REVIEW'
-            ORDER BY created_at DESC
-        """)
+    def _log_event(self, document_id: str, event_type: str, event_data: str):
+        """Append an audit event with its JSON-encoded data to the buffer (caller holds the lock)"""
+        self._event_buffer.append((document_id, event_type, event_data))
 
-        rows = cursor.fetchall()
-        conn.close()
+    def _flush_events(self, cursor, document_id: Optional[str] = None):
+        """
+        Insert buffered audit events with a single executemany (caller holds the lock)
 
-        return [dict(row) for row in rows]
+        audit_events references classifications, so an event can only be
+        written once its document is classified; the others stay buffered.
 
-    def get_all_classifications(self, limit: int = 100, offset: int = 0) -> List[Dict]:
-        """Get all classifications with pagination"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        Args:
+            cursor: Cursor of the caller's transaction
+            document_id: Only write this document's events (it is known to
+                exist in the caller's transaction); otherwise write the events
+                of every document already classified
+        """
+        if not self._event_buffer:
+            return
+
+        if document_id is not None:
+            ready = {document_id}
+        else:
+            pending_ids = list({event[0] for event in self._event_buffer})
+            placeholders = ','.join('?' * len(pending_ids))
+            ready = {
+                row[0] for row in cursor.execute(
+                    f"SELECT document_id FROM classifications WHERE document_id IN ({placeholders})",
+                    pending_ids
+                )
+            }
+
+        events = [event for event in self._event_buffer if event[0] in ready]
+        held = [event for event in self._event_buffer if event[0] not in ready]
+
+        if events:
+            cursor.executemany("""
+                INSERT INTO audit_events (document_id, event_type, event_data)
+                VALUES (?, ?, ?)
+            """, events)
+
+        if len(held) > self.MAX_HELD_EVENTS:
+            logger.warning("Dropping %d audit events for unclassified documents",
+                           len(held) - self.MAX_HELD_EVENTS)
+            held = held[-self.MAX_HELD_EVENTS:]
+        self._event_buffer[:] = held
 
-        cursor.execute("""
-            SELECT * FROM classifications
-            ORDER BY created_at DESC
-            LIMIT ? OFFSET ?
-        """, (limit, offset))
+    def get_classification(self, document_id: str) -> Optional[Dict]:
+        """Get classification by document ID"""
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.row_factory = sqlite3.Row
 
-        rows = cursor.fetchall()
-        conn.close()
+            cursor.execute("SELECT * FROM classifications WHERE document_id = ?", (document_id,))
+            row = cursor.fetchone()
 
-        return [dict(row) for row in rows]
+        if row:
+            return dict(row)
+        return None
 
-    def get_statistics(self) -> Dict:
-        """Get classification statistics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def get_pending_hitl_reviews(self, as_dicts: bool = False) -> List:
+        """
+        Get all classifications requiring HITL review
 
-        stats = {}
+        Args:
+            as_dicts: Return plain dicts instead of sqlite3.Row objects
 
-        # Total classifications
-        cursor.execute("SELECT COUNT(*) FROM classifications")
-        stats['total_classifications'] = cursor.fetchone()[0]
+        Returns:
+            List of rows, readable by column name (row['file_name'])
+        """
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.row_factory = sqlite3.Row
 
-        # By category
-        cursor.execute("""
-            SELECT final_category, COUNT(*) as count
-            FROM classifications
-            GROUP BY final_category
-        """)
-        stats['by_category'] = {row[0]: row[1] for row in cursor.fetchall()}
+            cursor.execute("""
+                SELECT * FROM classifications
+                WHERE hitl_status = 'REQUIRES_REVIEW'
+                ORDER BY created_at DESC
+            """)
 
-        # By HITL status
-        cursor.execute("""
-            SELECT hitl_status, COUNT(*) as count
-            FROM classifications
-            GROUP BY hitl_status
-        """)
-        stats['by_hitl_status'] = {row[0]: row[1] for row in cursor.fetchall()}
+            rows = cursor.fetchall()
 
-        # Average confidence by category
-        cursor.execute("""
-            SELECT final_category, AVG(confidence_score) as avg_confidence
-            FROM classifications
-            GROUP BY final_category
-        """)
-        stats['avg_confidence_by_category'] = {row[0]: round(row[1], 3) for row in cursor.fetchall()}
+        return [dict(row) for row in rows] if as_dicts else rows
 
-        # Auto-approval rate
-        cursor.execute("""
-            SELECT
-                COUNT(CASE WHEN hitl_status = 'AUTO_APPROVED' THEN 1 END) * 100.0 / COUNT(*) as rate
-            FROM classifications
-        """)
-        stats['auto_approval_rate'] = round(cursor.fetchone()[0] or 0, 2)
+    def get_all_classifications(self, limit: int = 100, offset: int = 0,
+                                as_dicts: bool = False,
+                                fields: Optional[List[str]] = None) -> List:
+        """
+        Get all classifications with pagination
+
+        Args:
+            limit: Maximum number of classifications
+            offset: Number of classifications to skip
+            as_dicts: Return plain dicts instead of sqlite3.Row objects
+            fields: Columns to select (all columns if not given)
+
+        Returns:
+            List of rows, readable by column name (row['file_name'])
+        """
+        if fields:
+            unknown = set(fields) - self.CLASSIFICATION_COLUMNS
+            if unknown:
+                raise ValueError(f"Unknown classification columns: {sorted(unknown)}")
+            columns = ', '.join(fields)
+        else:
+            columns = '*'
 
-        # Average processing time
-        cursor.execute("SELECT AVG(processing_time_seconds) FROM classifications")
-        stats['avg_processing_time'] = round(cursor.fetchone()[0] or 0, 3)
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.row_factory = sqlite3.Row
 
-        conn.close()
-        return stats
+            cursor.execute(f"""
+                SELECT {columns} FROM classifications
+                ORDER BY created_at DESC
+                LIMIT ? OFFSET ?
+            """, (limit, offset))
 
-    def export_to_json(self, output_path: Path):
-        """Export all data to JSON"""
-        data = {
-            'classifications': self.get_all_classifications(limit=10000),
-            'statistics': self.get_statistics(),
-            'exported_at': datetime.now().isoformat()
+            rows = cursor.fetchall()
+
+        return [dict(row) for row in rows] if as_dicts else rows
+
+    def get_statistics(self) -> Dict:
+        """Get classification statistics"""
+        # One pass over the table: per-category rows, per-HITL-status rows and a
+        # single totals row, tagged by the first column
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("""
+                SELECT 'category', final_category, COUNT(*), AVG(confidence_score), NULL, NULL
+                FROM classifications
+                GROUP BY final_category
+                UNION ALL
+                SELECT 'hitl_status', hitl_status, COUNT(*), NULL, NULL, NULL
+                FROM classifications
+                GROUP BY hitl_status
+                UNION ALL
+                SELECT 'total', NULL, COUNT(*), NULL,
+                    AVG(processing_time_seconds),
+                    COUNT(CASE WHEN hitl_status = 'AUTO_APPROVED' THEN 1 END) * 100.0 / COUNT(*)
+                FROM classifications
+            """)
+            rows = cursor.fetchall()
+
+        by_category = {}
+        by_hitl_status = {}
+        avg_confidence_by_category = {}
+        total = 0
+        avg_processing_time = None
+        auto_approval_rate = None
+
+        for kind, key, count, avg_confidence, avg_time, approval_rate in rows:
+            if kind == 'category':
+                by_category[key] = count
+                avg_confidence_by_category[key] = round(avg_confidence, 3)
+            elif kind == 'hitl_status':
+                by_hitl_status[key] = count
+            else:
+                total = count
+                avg_processing_time = avg_time
+                auto_approval_rate = approval_rate
+
+        return {
+            'total_classifications': total,
+            'by_category': by_category,
+            'by_hitl_status': by_hitl_status,
+            'avg_confidence_by_category': avg_confidence_by_category,
+            'auto_approval_rate': round(auto_approval_rate or 0, 2),
+            'avg_processing_time': round(avg_processing_time or 0, 3)
         }
 
-        with open(output_path, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+    def export_to_json(self, output_path: Path, limit: int = 10000):
+        """
+        Export all data to JSON
+
+        Classifications are streamed from the cursor to the file in batches, so
+        memory use does not grow with the number of exported rows.
 
-        print(f"Audit data exported to: {output_path}")
+        Args:
+            output_path: Destination JSON file
+            limit: Maximum number of classifications to export
+        """
+        statistics = self.get_statistics()
+
+        with open(output_path, 'w') as f, self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("""
+                SELECT * FROM classifications
+                ORDER BY created_at DESC
+                LIMIT ?
+            """, (limit,))
+            columns = [description[0] for description in cursor.description]
+
+            # Same layout as json.dump(data, f, indent=2), written one row at a time
+            f.write('{\n  "classifications": [')
+            row_count = 0
+            while True:
+                rows = cursor.fetchmany(self.EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    f.write(',\n    ' if row_count else '\n    ')
+                    f.write(json.dumps(dict(zip(columns, row)), indent=2, default=str).replace('\n', '\n    '))
+                    row_count += 1
+            f.write('\n  ],' if row_count else '],')
+
+            f.write('\n  "statistics": ')
+            f.write(json.dumps(statistics, indent=2, default=str).replace('\n', '\n  '))
+            f.write(',\n  "exported_at": ')
+            f.write(json.dumps(datetime.now().isoformat()))
+            f.write('\n}')
+
+        logger.info("Audit data exported to: %s", output_path)
 
     def log_chat_message(self, session_id: str, role: str, message: str,
                         document_id: Optional[str] = None, context_used: Optional[str] = None) -> int:
@@ -366,59 +606,92 @@ class AuditLogger:
         Returns:
             Message ID
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._lock:
+            cursor = self._conn.cursor()
 
-        cursor.execute("""
-            INSERT INTO chat_history (session_id, document_id, role, message, context_used)
-            VALUES (?, ?, ?, ?, ?)
-        """, (session_id, document_id, role, message, context_used))
+            # Only reference documents that exist, so the foreign key holds for unknown IDs
+            cursor.execute("""
+                INSERT INTO chat_history (session_id, document_id, role, message, context_used)
+                VALUES (?, (SELECT document_id FROM classifications WHERE document_id = ?), ?, ?, ?)
+            """, (session_id, document_id, role, message, context_used))
 
-        message_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+            message_id = cursor.lastrowid
 
         return message_id
 
-    def get_chat_history(self, session_id: str, limit: int = 50) -> List[Dict]:
+    def log_chat_messages(self, messages: List[tuple]) -> int:
         """
-        Get chat history for a session
+        Log several chat messages in one transaction
 
         Args:
-            session_id: Chat session identifier
-            limit: Maximum number of messages to retrieve
+            messages: Tuples of (session_id, role, message, document_id, context_used),
+                      matching the arguments of log_chat_message
 
         Returns:
-            List of chat messages
+            Number of messages logged
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        rows = [
+            (session_id, document_id, role, message, context_used)
+            for session_id, role, message, document_id, context_used in messages
+        ]
 
-        cursor.execute("""
-            SELECT * FROM chat_history
-            WHERE session_id = ?
-            ORDER BY created_at ASC
-            LIMIT ?
-        """, (session_id, limit))
+        with self._transaction() as cursor:
+            cursor.executemany("""
+                INSERT INTO chat_history (session_id, document_id, role, message, context_used)
+                VALUES (?, (SELECT document_id FROM classifications WHERE document_id = ?), ?, ?, ?)
+            """, rows)
 
-        rows = cursor.fetchall()
-        conn.close()
+        return len(rows)
 
-        return [dict(row) for row in rows]
-
-    def clear_all_logs(self):
-        """Clear all data from all tables in the database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def get_chat_history(self, session_id: str, limit: int = 50, as_dicts: bool = False,
+                         latest: bool = False) -> List:
+        """
+        Get chat history for a session
 
-        cursor.execute("DELETE FROM classifications")
-        cursor.execute("DELETE FROM hitl_reviews")
-        cursor.execute("DELETE FROM audit_events")
-        cursor.execute("DELETE FROM performance_metrics")
-        cursor.execute("DELETE FROM chat_history")
+        Args:
+            session_id: Chat session identifier
+            limit: Maximum number of messages to retrieve
+            as_dicts: Return plain dicts instead of sqlite3.Row objects
+            latest: Retrieve the newest `limit` messages instead of the oldest
 
-        conn.commit()
-        conn.close()
-        print("All audit logs and related data cleared.")
+        Returns:
+            List of chat messages, readable by column name (msg['role'])
+        """
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.row_factory = sqlite3.Row
+
+            if latest:
+                # Newest messages, still returned in chronological order
+                cursor.execute("""
+                    SELECT * FROM (
+                        SELECT * FROM chat_history
+                        WHERE session_id = ?
+                        ORDER BY created_at DESC, id DESC
+                        LIMIT ?
+                    )
+                    ORDER BY created_at ASC, id ASC
+                """, (session_id, limit))
+            else:
+                cursor.execute("""
+                    SELECT * FROM chat_history
+                    WHERE session_id = ?
+                    ORDER BY created_at ASC
+                    LIMIT ?
+                """, (session_id, limit))
+
+            rows = cursor.fetchall()
+
+        return [dict(row) for row in rows] if as_dicts else rows
 
+    def clear_all_logs(self):
+        """Clear all data from all tables in the database."""
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM hitl_reviews")
+            cursor.execute("DELETE FROM audit_events")
+            cursor.execute("DELETE FROM performance_metrics")
+            cursor.execute("DELETE FROM chat_history")
+            cursor.execute("DELETE FROM classifications")
+            self._event_buffer.clear()
+
+        logger.info("All audit logs and related data cleared.")
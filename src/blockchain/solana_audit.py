@@ -2,33 +2,162 @@
 Solana Blockchain Integration for Immutable Audit Trails
 Creates cryptographically verifiable records of classification decisions
 """
+import asyncio
+import base64
+import binascii
 import hashlib
 import json
+import math
+import re
+import struct
 import time
-from typing import Dict, Optional
-from solana.rpc.api import Client
-from solders.keypair import Keypair
-from solders.pubkey import Pubkey
-from solders.instruction import Instruction
-from solders.transaction import Transaction
-from solders.message import Message
-from solders.system_program import TransferParams, transfer
+import threading
+from functools import cached_property
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 from ..config import Config
 
+# solana / solders load native extensions and a large dependency graph, so they
+# are imported where first used rather than when this module is imported
+if TYPE_CHECKING:
+    from solana.rpc.api import Client
+    from solana.rpc.async_api import AsyncClient
+    from solders.keypair import Keypair
+    from solders.pubkey import Pubkey
+
+
+# hashlib's SHA-256 is OpenSSL's, which already dispatches to SHA-NI / ARMv8
+# SHA extensions at runtime when the CPU has them; bind it once for the hot path
+_sha256 = hashlib.sha256
+
+_encode_json_string = json.encoder.encode_basestring_ascii
+
+
+def _encode_json_value(value) -> str:
+    """Encode a scalar exactly as json.dumps does, with fast paths for str/int/float"""
+    value_type = type(value)
+    if value_type is str:
+        return _encode_json_string(value)
+    if value_type is int:
+        return int.__repr__(value)
+    if value_type is float and math.isfinite(value):
+        return float.__repr__(value)
+    return json.dumps(value)
+
+
+# Audited fields in sorted key order (timestamp, which has a default, comes last),
+# and the record layout json.dumps(audit_data, sort_keys=True) produces for them
+_AUDIT_FIELDS = ('citation_snippet', 'confidence_score', 'document_id', 'final_category', 'reasoning_summary')
+_AUDIT_RECORD_FORMAT = (
+    '{"citation_snippet": %s, "confidence_score": %s, "document_id": %s, '
+    '"final_category": %s, "reasoning_summary": %s, "timestamp": %s}'
+)
+
+
+# On-chain memo layout: tag, category code (0 for a category outside
+# Config.CATEGORIES), raw SHA-256 audit digest and document id length, followed
+# by the UTF-8 document id; base64-encoded, so at most 392 of the 566 memo bytes
+_MEMO_TAG = b'AUDT'
+_MEMO_HEADER = struct.Struct('<4sB32sB')
+_CATEGORY_CODES = {category: code for code, category in enumerate(Config.CATEGORIES, 1)}
+_CATEGORY_NAMES = {code: category for category, code in _CATEGORY_CODES.items()}
+
+# How the memo program echoes a memo into the transaction logs
+_MEMO_LOG_PATTERN = re.compile(r'Memo \(len \d+\): "(.*)"')
+
+
+def _encode_compact_u16(value: int) -> bytes:
+    """Encode a length in Solana's compact-u16 (shortvec) wire format"""
+    encoded = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if not value:
+            encoded.append(byte)
+            return bytes(encoded)
+        encoded.append(byte | 0x80)
+
+
+def _is_blockhash_not_found(error: Exception) -> bool:
+    """Whether a send failed because the transaction's blockhash has expired"""
+    return 'blockhashnotfound' in str(error).replace(' ', '').lower()
+
+
+# One RPC client per process: its underlying httpx session keeps the TCP/TLS
+# connection to the cluster alive across SolanaAuditTrail instances and calls
+_rpc_client: Optional["Client"] = None
+_rpc_client_lock = threading.Lock()
+
+
+def _get_rpc_client() -> "Client":
+    """Return the shared Solana RPC client, creating it on first use"""
+    global _rpc_client
+    with _rpc_client_lock:
+        if _rpc_client is None:
+            from solana.rpc.api import Client
+            _rpc_client = Client(Config.SOLANA_CLUSTER_URL)
+        return _rpc_client
+
+
+# Human-readable audit trail layout used by get_audit_trail_summary
+_SUMMARY_SEPARATOR = "=" * 80
+_SUMMARY_TEMPLATE = (
+    "{separator}\n"
+    "BLOCKCHAIN AUDIT TRAIL\n"
+    "{separator}\n"
+    "Document ID: {document_id}\n"
+    "Classification: {category}\n"
+    "Audit Hash: {audit_hash}\n"
+    "Transaction Hash: {transaction_hash}\n"
+    "Timestamp: {time_utc}\n"
+    "Cluster: {cluster}\n"
+    "Status: {status}\n"
+    "{explorer_line}"
+    "{separator}\n"
+    "\nThis record is cryptographically secured and immutable.\n"
+    "The audit hash can be independently verified against the classification data."
+)
+
 
 class SolanaAuditTrail:
     """Manages immutable audit trails on Solana blockchain"""
 
-    def __init__(self):
-        """Initialize Solana client and keypair"""
-        self.client = Client(Config.SOLANA_CLUSTER_URL)
+    # Seconds a fetched blockhash is reused before asking the cluster again
+    BLOCKHASH_TTL_SECONDS = 30
 
-        # Generate or load keypair (in production, load from secure storage)
-        self.keypair = Keypair()
+    # Transactions a batch keeps in flight at once (bounded by the RPC rate limit)
+    MAX_CONCURRENT_SENDS = 8
 
-        # Memo program ID (for storing data on-chain)
-        self.memo_program_id = Pubkey.from_string("MemoSq4gqABAXKb96qnH8TysNcWxMyWCqXgDLGmfcHr")
+    def __init__(self):
+        """Initialize audit trail state; the Solana client and keypair are created on first use"""
+        self._keypair: Optional["Keypair"] = None
+        self._keypair_lock = threading.Lock()
+
+        # Most recent blockhash and when it was fetched (valid on-chain for ~150 slots, ~60s)
+        self._cached_blockhash: Optional[Tuple[object, float]] = None
+        self._blockhash_lock = threading.Lock()
+
+    @cached_property
+    def client(self) -> "Client":
+        """Shared Solana RPC client"""
+        return _get_rpc_client()
+
+    @property
+    def keypair(self) -> "Keypair":
+        """Signing keypair, generated on first use"""
+        with self._keypair_lock:
+            if self._keypair is None:
+                from solders.keypair import Keypair
+
+                # Generate or load keypair (in production, load from secure storage)
+                self._keypair = Keypair()
+            return self._keypair
+
+    @cached_property
+    def memo_program_id(self) -> "Pubkey":
+        """Memo program ID (for storing data on-chain)"""
+        from solders.pubkey import Pubkey
+        return Pubkey.from_string("MemoSq4gqABAXKb96qnH8TysNcWxMyWCqXgDLGmfcHr")
 
     def _get_cluster_param(self) -> Optional[str]:
         """
@@ -49,6 +178,103 @@ class SolanaAuditTrail:
             # Custom RPC endpoint - no public explorer link available
             return None
 
+    def _get_recent_blockhash(self, refresh: bool = False):
+        """
+        Get a recent blockhash, reusing the cached one while it is fresh
+
+        Args:
+            refresh: Ignore the cached blockhash and fetch a new one
+
+        Returns:
+            Recent blockhash from the cluster
+        """
+        with self._blockhash_lock:
+            if not refresh and self._cached_blockhash is not None:
+                blockhash, fetched_at = self._cached_blockhash
+                if time.monotonic() - fetched_at < self.BLOCKHASH_TTL_SECONDS:
+                    return blockhash
+
+            blockhash = self.client.get_latest_blockhash().value.blockhash
+            self._cached_blockhash = (blockhash, time.monotonic())
+            return blockhash
+
+    @cached_property
+    def _memo_message_prefix(self) -> bytes:
+        """Serialized legacy message header and account keys for a payer-signed memo transaction"""
+        return (
+            # 1 required signature (payer), 0 read-only signed, 1 read-only unsigned (memo program)
+            bytes((1, 0, 1))
+            + _encode_compact_u16(2) + bytes(self.keypair.pubkey()) + bytes(self.memo_program_id)
+        )
+
+    def _build_memo_transaction(self, memo: bytes, recent_blockhash) -> bytes:
+        """
+        Serialize and sign a single-memo transaction without the solders wrappers
+
+        Produces the same wire bytes as Transaction([keypair], Message.new_with_blockhash(
+        [Instruction(memo_program_id, memo, [])], payer, blockhash), blockhash).
+
+        Args:
+            memo: Memo payload
+            recent_blockhash: Blockhash to sign against
+
+        Returns:
+            Signed transaction bytes
+        """
+        message = (
+            self._memo_message_prefix
+            + bytes(recent_blockhash)
+            + b'\x01\x01\x00'  # one instruction: program id index 1, no accounts
+            + _encode_compact_u16(len(memo)) + memo
+        )
+        signature = self.keypair.sign_message(message)
+        return b'\x01' + bytes(signature) + message
+
+    def _send_memo_transaction(self, memo: bytes, recent_blockhash):
+        """
+        Sign and send a memo transaction, retrying once if the blockhash expired
+
+        Args:
+            memo: Memo payload
+            recent_blockhash: Blockhash to sign against
+
+        Returns:
+            send_raw_transaction response
+        """
+        for attempt in range(2):
+            transaction = self._build_memo_transaction(memo, recent_blockhash)
+
+            try:
+                return self.client.send_raw_transaction(transaction)
+            except Exception as e:
+                if attempt or not _is_blockhash_not_found(e):
+                    raise
+                print("Cached blockhash expired, fetching a new one")
+                recent_blockhash = self._get_recent_blockhash(refresh=True)
+
+    async def _send_memo_transaction_async(self, client: "AsyncClient", memo: bytes, recent_blockhash):
+        """
+        Async counterpart of _send_memo_transaction
+
+        Args:
+            client: Async RPC client to send through
+            memo: Memo payload
+            recent_blockhash: Blockhash to sign against
+
+        Returns:
+            send_raw_transaction response
+        """
+        for attempt in range(2):
+            transaction = self._build_memo_transaction(memo, recent_blockhash)
+
+            try:
+                return await client.send_raw_transaction(transaction)
+            except Exception as e:
+                if attempt or not _is_blockhash_not_found(e):
+                    raise
+                print("Cached blockhash expired, fetching a new one")
+                recent_blockhash = await asyncio.to_thread(self._get_recent_blockhash, True)
+
     def _create_explorer_url(self, tx_hash: str, is_simulated: bool = False) -> Optional[str]:
         """
         Create Solana Explorer URL for a transaction
@@ -73,6 +299,27 @@ class SolanaAuditTrail:
 
         return f"https://explorer.solana.com/tx/{tx_hash}?cluster={cluster_param}"
 
+    def _canonical_audit_bytes(self, classification_result: Dict) -> bytes:
+        """
+        Serialize the audited fields of a classification result deterministically
+
+        Args:
+            classification_result: The classification result to serialize
+
+        Returns:
+            Bytes that are hashed into the audit hash
+        """
+        # Fixed-schema equivalent of json.dumps(audit_data, sort_keys=True): the keys
+        # are written in sorted order, so existing audit hashes stay verifiable
+        return (_AUDIT_RECORD_FORMAT % (
+            _encode_json_value(classification_result['citation_snippet']),
+            _encode_json_value(classification_result['confidence_score']),
+            _encode_json_value(classification_result['document_id']),
+            _encode_json_value(classification_result['final_category']),
+            _encode_json_value(classification_result['reasoning_summary']),
+            _encode_json_value(classification_result.get('timestamp', int(time.time())))
+        )).encode()
+
     def create_audit_hash(self, classification_result: Dict) -> str:
         """
         Create a cryptographic hash of the classification result
@@ -83,148 +330,437 @@ class SolanaAuditTrail:
         Returns:
             SHA-256 hash of the result
         """
-        # Create deterministic data structure
-        audit_data = {
-            'document_id': classification_result['document_id'],
-            'final_category': classification_result['final_category'],
-            'confidence_score': classification_result['confidence_score'],
-            'reasoning_summary': classification_result['reasoning_summary'],
-            'citation_snippet': classification_result['citation_snippet'],
-            'timestamp': classification_result.get('timestamp', int(time.time()))
-        }
+        return _sha256(self._canonical_audit_bytes(classification_result)).hexdigest()
+
+    def create_audit_hashes(self, classification_results: List[Dict]) -> List[str]:
+        """
+        Create audit hashes for several classification results
+
+        Records are encoded column by column (one pass per audited field over the
+        whole batch), then each row is formatted and hashed in one tight pass.
+        Produces the same hashes as create_audit_hash.
+
+        Args:
+            classification_results: The classification results to hash
 
-        # Create hash
-        data_string = json.dumps(audit_data, sort_keys=True)
-        hash_object = hashlib.sha256(data_string.encode())
-        return hash_object.hexdigest()
+        Returns:
+            SHA-256 hashes, in the same order as the input
+        """
+        now = int(time.time())
+        columns = [
+            [_encode_json_value(result[field]) for result in classification_results]
+            for field in _AUDIT_FIELDS
+        ]
+        columns.append([_encode_json_value(result.get('timestamp', now)) for result in classification_results])
 
-    def record_to_blockchain(self, classification_result: Dict) -> Optional[Dict]:
+        return [_sha256((_AUDIT_RECORD_FORMAT % row).encode()).hexdigest() for row in zip(*columns)]
+
+    def record_to_blockchain(self, classification_result: Dict,
+                             audit_hash: Optional[str] = None) -> Optional[Dict]:
         """
         Record classification result to Solana blockchain
 
         Args:
             classification_result: Classification result to record
+            audit_hash: Precomputed audit hash (computed here if not given)
 
         Returns:
             Dict with transaction details or None if failed
         """
-        try:
-            # Create audit hash
+        # Create audit hash (once; the simulated fallbacks reuse it)
+        if audit_hash is None:
             audit_hash = self.create_audit_hash(classification_result)
 
+        try:
             print(f"Creating blockchain audit record...")
             print(f"Audit Hash: {audit_hash}")
 
-            # Create memo with audit data
-            memo_data = f"AUDIT:{classification_result['document_id']}:{classification_result['final_category']}:{audit_hash}"
-
-            # Ensure memo data is not too long (max 566 bytes for memo)
-            if len(memo_data.encode('utf-8')) > 566:
-                memo_data = memo_data[:566]
-
-            # Create memo instruction
-            memo_instruction = Instruction(
-                program_id=self.memo_program_id,
-                accounts=[],
-                data=memo_data.encode('utf-8')
-            )
+            memo_data = self._build_memo_data(classification_result, audit_hash)
 
             # Get recent blockhash
             try:
-                blockhash_resp = self.client.get_latest_blockhash()
-                recent_blockhash = blockhash_resp.value.blockhash
+                recent_blockhash = self._get_recent_blockhash()
             except Exception as e:
                 print(f"Warning: Could not get blockhash from cluster: {e}")
                 print("Using simulated transaction hash for demo purposes")
 
                 # For demo/testing when devnet is unavailable
-                simulated_tx_hash = hashlib.sha256(
-                    f"{audit_hash}:{time.time()}".encode()
-                ).hexdigest()
-
-                return {
-                    'transaction_hash': simulated_tx_hash,
-                    'audit_hash': audit_hash,
-                    'document_id': classification_result['document_id'],
-                    'category': classification_result['final_category'],
-                    'timestamp': int(time.time()),
-                    'cluster': Config.SOLANA_CLUSTER_URL,
-                    'status': 'SIMULATED',
-                    'memo': memo_data
-                }
-
-            # Create message and transaction
-            message = Message.new_with_blockhash(
-                [memo_instruction],
-                self.keypair.pubkey(),
-                recent_blockhash
-            )
+                return self._make_simulated_record(classification_result, audit_hash, memo=memo_data)
 
-            transaction = Transaction([self.keypair], message, recent_blockhash)
+            # Create, sign and send the transaction
+            response = self._send_memo_transaction(memo_data.encode('utf-8'), recent_blockhash)
 
-            # Sign and send
-            response = self.client.send_transaction(transaction)
-
-            tx_hash = str(response.value)
+            signature = response.value
+            tx_hash = str(signature)
             print(f"Transaction sent: {tx_hash}")
 
             # Wait for confirmation (with timeout)
-            max_retries = 10
-            for i in range(max_retries):
-                try:
-                    status = self.client.get_signature_statuses([tx_hash])
-                    if status.value[0] is not None:
-                        print(f"Transaction confirmed!")
-                        break
-                except:
-                    pass
-                time.sleep(2)
-
-            # Create response with explorer URL
-            response = {
-                'transaction_hash': tx_hash,
-                'audit_hash': audit_hash,
-                'document_id': classification_result['document_id'],
-                'category': classification_result['final_category'],
-                'timestamp': int(time.time()),
-                'cluster': Config.SOLANA_CLUSTER_URL,
-                'status': 'CONFIRMED'
-            }
+            if self._wait_for_confirmation(signature):
+                print(f"Transaction confirmed!")
 
-            # Add explorer URL if available (only for public clusters)
-            explorer_url = self._create_explorer_url(tx_hash, is_simulated=False)
-            if explorer_url:
-                response['explorer_url'] = explorer_url
-
-            return response
+            return self._make_confirmed_record(classification_result, audit_hash, tx_hash)
 
         except Exception as e:
             print(f"Blockchain recording error: {e}")
             print("Creating simulated audit record for demo...")
 
             # Fallback to simulated hash
+            return self._make_simulated_record(classification_result, audit_hash, error=str(e))
+
+    def _build_memo_data(self, classification_result: Dict, audit_hash: str) -> str:
+        """
+        Build the on-chain memo for a classification result
+
+        Args:
+            classification_result: Classification result being recorded
+            audit_hash: Audit hash of the result
+
+        Returns:
+            Memo text
+        """
+        document_id = classification_result['document_id'].encode('utf-8')
+        if len(document_id) > 255:
+            raise ValueError(f"Document ID too long for audit memo ({len(document_id)} bytes)")
+
+        memo = _MEMO_HEADER.pack(
+            _MEMO_TAG,
+            _CATEGORY_CODES.get(classification_result['final_category'], 0),
+            bytes.fromhex(audit_hash),
+            len(document_id)
+        ) + document_id
+
+        return base64.b64encode(memo).decode('ascii')
+
+    @staticmethod
+    def parse_memo_data(memo_data: str) -> Optional[Dict]:
+        """
+        Decode an on-chain audit memo
+
+        Args:
+            memo_data: Memo text as written by record_to_blockchain
+
+        Returns:
+            Dict with document_id, category and audit_hash, or None if the
+            memo is not an audit memo
+        """
+        try:
+            memo = base64.b64decode(memo_data, validate=True)
+            tag, category_code, digest, id_length = _MEMO_HEADER.unpack_from(memo)
+        except (binascii.Error, struct.error):
+            return None
+
+        if tag != _MEMO_TAG or len(memo) != _MEMO_HEADER.size + id_length:
+            return None
+
+        return {
+            'document_id': memo[_MEMO_HEADER.size:].decode('utf-8'),
+            'category': _CATEGORY_NAMES.get(category_code),
+            'audit_hash': digest.hex()
+        }
+
+    def _make_confirmed_record(self, classification_result: Dict, audit_hash: str, tx_hash: str) -> Dict:
+        """
+        Build the audit record for a transaction sent to the cluster
+
+        Args:
+            classification_result: Classification result being recorded
+            audit_hash: Audit hash of the result
+            tx_hash: Transaction signature
+
+        Returns:
+            Dict with transaction details
+        """
+        # Create response with explorer URL
+        record = {
+            'transaction_hash': tx_hash,
+            'audit_hash': audit_hash,
+            'document_id': classification_result['document_id'],
+            'category': classification_result['final_category'],
+            'timestamp': int(time.time()),
+            'cluster': Config.SOLANA_CLUSTER_URL,
+            'status': 'CONFIRMED'
+        }
+
+        # Add explorer URL if available (only for public clusters)
+        explorer_url = self._create_explorer_url(tx_hash, is_simulated=False)
+        if explorer_url:
+            record['explorer_url'] = explorer_url
+
+        return record
+
+    def _make_simulated_record(self, classification_result: Dict, audit_hash: str,
+                               memo: Optional[str] = None, error: Optional[str] = None) -> Dict:
+        """
+        Build a simulated audit record for when the cluster cannot be used
+
+        Args:
+            classification_result: Classification result being recorded
+            audit_hash: Audit hash of the result
+            memo: Memo that would have been written on-chain
+            error: Error that prevented the on-chain write
+
+        Returns:
+            Dict with simulated transaction details
+        """
+        now = time.time()
+        record = {
+            'transaction_hash': _sha256(f"{audit_hash}:{now}".encode()).hexdigest(),
+            'audit_hash': audit_hash,
+            'document_id': classification_result['document_id'],
+            'category': classification_result['final_category'],
+            'timestamp': int(now),
+            'cluster': Config.SOLANA_CLUSTER_URL,
+            'status': 'SIMULATED'
+        }
+
+        if memo is not None:
+            record['memo'] = memo
+        if error is not None:
+            record['error'] = error
+
+        return record
+
+    def _wait_for_confirmation(self, signature) -> bool:
+        """
+        Wait until a transaction is confirmed
+
+        Uses a signatureSubscribe WebSocket notification, and falls back to
+        polling get_signature_statuses if the WebSocket cannot be used.
+
+        Args:
+            signature: Transaction signature returned by send_transaction
+
+        Returns:
+            True if the transaction was confirmed before the timeout
+        """
+        try:
+            return asyncio.run(self._subscribe_confirmation(signature))
+        except Exception as e:
+            print(f"Warning: signature subscription unavailable ({e}), polling instead")
+
+        # Poll fallback
+        max_retries = 10
+        for i in range(max_retries):
+            try:
+                status = self.client.get_signature_statuses([signature])
+                if status.value[0] is not None:
+                    return True
+            except:
+                pass
+            time.sleep(2)
+
+        return False
+
+    async def _subscribe_confirmation(self, signature) -> bool:
+        """
+        Wait for the cluster to push a confirmation notification for a signature
+
+        Args:
+            signature: Transaction signature to watch
+
+        Returns:
+            True if confirmed, False if the timeout expired first
+        """
+        return (await self._subscribe_confirmations([signature]))[0]
+
+    async def _subscribe_confirmations(self, signatures: List) -> List[bool]:
+        """
+        Wait for confirmation notifications for several signatures over one WebSocket
+
+        Args:
+            signatures: Transaction signatures to watch
+
+        Returns:
+            Whether each signature was confirmed before the timeout, in input order
+        """
+        from solana.rpc.commitment import Confirmed
+        from solana.rpc.websocket_api import connect as ws_connect
+
+        confirmed = [False] * len(signatures)
+        subscription_index: Dict[int, int] = {}
+        notified = set()
+
+        async with ws_connect(Config.SOLANA_WS_URL) as websocket:
+            # The request id ties each subscription back to its signature
+            for index, signature in enumerate(signatures):
+                await websocket.signature_subscribe(signature, commitment=Confirmed, request_id=index)
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + Config.SOLANA_CONFIRM_TIMEOUT
+
+            while not all(confirmed):
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    messages = await asyncio.wait_for(websocket.recv(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+
+                # A notification can arrive before the reply to a later subscribe
+                for message in messages:
+                    if hasattr(message, 'subscription'):
+                        notified.add(message.subscription)
+                    elif getattr(message, 'result', None) is not None:
+                        subscription_index[message.result] = message.id
+                    else:
+                        # A rejected subscribe would never be notified; let the
+                        # caller poll instead of waiting out the timeout
+                        raise RuntimeError(f"signatureSubscribe failed: {getattr(message, 'error', message)}")
+
+                for subscription_id in notified.intersection(subscription_index):
+                    confirmed[subscription_index[subscription_id]] = True
+
+            for subscription_id, index in subscription_index.items():
+                if not confirmed[index]:
+                    await websocket.signature_unsubscribe(subscription_id)
+
+        return confirmed
+
+    async def _poll_confirmations_async(self, client: "AsyncClient", signatures: List) -> List[bool]:
+        """
+        Poll get_signature_statuses for several signatures at once
+
+        Args:
+            client: Async RPC client to poll through
+            signatures: Transaction signatures to check
+
+        Returns:
+            Whether each signature was confirmed before the retries ran out
+        """
+        confirmed = [False] * len(signatures)
+
+        max_retries = 10
+        for i in range(max_retries):
+            pending = [index for index, done in enumerate(confirmed) if not done]
+            if not pending:
+                break
+            try:
+                status = await client.get_signature_statuses([signatures[index] for index in pending])
+                for index, signature_status in zip(pending, status.value):
+                    if signature_status is not None:
+                        confirmed[index] = True
+            except:
+                pass
+            if not all(confirmed):
+                await asyncio.sleep(2)
+
+        return confirmed
+
+    async def record_to_blockchain_async(self, classification_result: Dict,
+                                         audit_hash: Optional[str] = None) -> Optional[Dict]:
+        """
+        Async counterpart of record_to_blockchain
+
+        Args:
+            classification_result: Classification result to record
+            audit_hash: Precomputed audit hash (computed here if not given)
+
+        Returns:
+            Dict with transaction details or None if failed
+        """
+        if audit_hash is None:
             audit_hash = self.create_audit_hash(classification_result)
-            simulated_tx_hash = hashlib.sha256(
-                f"{audit_hash}:{time.time()}".encode()
-            ).hexdigest()
+        records = await self.record_batch_to_blockchain_async([classification_result], [audit_hash])
+        return records[0]
 
-            return {
-                'transaction_hash': simulated_tx_hash,
-                'audit_hash': audit_hash,
-                'document_id': classification_result['document_id'],
-                'category': classification_result['final_category'],
-                'timestamp': int(time.time()),
-                'cluster': Config.SOLANA_CLUSTER_URL,
-                'status': 'SIMULATED',
-                'error': str(e)
-            }
+    async def record_batch_to_blockchain_async(self, classification_results: List[Dict],
+                                               audit_hashes: Optional[List[str]] = None) -> List[Optional[Dict]]:
+        """
+        Record several classification results to Solana blockchain concurrently
+
+        The batch shares one recent blockhash, keeps up to MAX_CONCURRENT_SENDS
+        transactions in flight, and waits for all confirmations over a single
+        WebSocket connection.
+
+        Args:
+            classification_results: Classification results to record
+            audit_hashes: Precomputed audit hashes (computed here if not given)
+
+        Returns:
+            Transaction details for each result, in the same order as the input
 
-    def verify_audit_record(self, transaction_hash: str) -> Optional[Dict]:
+        Raises:
+            ValueError: If a document ID does not fit in an audit memo
+        """
+        if audit_hashes is None:
+            audit_hashes = self.create_audit_hashes(classification_results)
+        memos = [
+            self._build_memo_data(result, audit_hash)
+            for result, audit_hash in zip(classification_results, audit_hashes)
+        ]
+
+        print(f"Creating {len(classification_results)} blockchain audit records...")
+
+        try:
+            recent_blockhash = await asyncio.to_thread(self._get_recent_blockhash)
+        except Exception as e:
+            print(f"Warning: Could not get blockhash from cluster: {e}")
+            print("Using simulated transaction hashes for demo purposes")
+            return [
+                self._make_simulated_record(result, audit_hash, memo=memo)
+                for result, audit_hash, memo in zip(classification_results, audit_hashes, memos)
+            ]
+
+        from solana.rpc.async_api import AsyncClient
+
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_SENDS)
+
+        async with AsyncClient(Config.SOLANA_CLUSTER_URL) as client:
+            async def send(memo: str):
+                async with semaphore:
+                    return await self._send_memo_transaction_async(client, memo.encode('utf-8'), recent_blockhash)
+
+            responses = await asyncio.gather(*[send(memo) for memo in memos], return_exceptions=True)
+
+            signatures = [
+                response.value for response in responses
+                if not isinstance(response, BaseException)
+            ]
+            for signature in signatures:
+                print(f"Transaction sent: {signature}")
+
+            if signatures:
+                try:
+                    confirmations = await self._subscribe_confirmations(signatures)
+                except Exception as e:
+                    print(f"Warning: signature subscription unavailable ({e}), polling instead")
+                    confirmations = await self._poll_confirmations_async(client, signatures)
+                print(f"{sum(confirmations)}/{len(signatures)} transactions confirmed")
+
+        records = []
+        for result, audit_hash, response in zip(classification_results, audit_hashes, responses):
+            if isinstance(response, BaseException):
+                print(f"Blockchain recording error: {response}")
+                records.append(self._make_simulated_record(result, audit_hash, error=str(response)))
+            else:
+                records.append(self._make_confirmed_record(result, audit_hash, str(response.value)))
+
+        return records
+
+    def record_batch_to_blockchain(self, classification_results: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Record several classification results to Solana blockchain
+
+        Runs record_batch_to_blockchain_async to completion, so the transactions
+        are sent and confirmed concurrently rather than one after another.
+
+        Args:
+            classification_results: Classification results to record
+
+        Returns:
+            Transaction details for each result, in the same order as the input
+        """
+        return asyncio.run(self.record_batch_to_blockchain_async(classification_results))
+
+    def verify_audit_record(self, transaction_hash: str,
+                            expected_audit_hash: Optional[str] = None) -> Optional[Dict]:
         """
         Verify an audit record on the blockchain
 
         Args:
             transaction_hash: The transaction hash to verify
+            expected_audit_hash: Audit hash the on-chain memo must carry
 
         Returns:
             Verification result or None
@@ -239,13 +775,27 @@ class SolanaAuditTrail:
                     'error': 'Transaction not found'
                 }
 
-            return {
+            result = {
                 'verified': True,
                 'transaction_hash': transaction_hash,
                 'block_time': tx_info.value.block_time,
                 'slot': tx_info.value.slot
             }
 
+            # Recover the audit memo from the memo program's log line
+            meta = tx_info.value.transaction.meta
+            for line in (meta.log_messages or []) if meta else []:
+                match = _MEMO_LOG_PATTERN.search(line)
+                memo = self.parse_memo_data(match.group(1)) if match else None
+                if memo:
+                    result.update(memo)
+                    break
+
+            if expected_audit_hash is not None:
+                result['verified'] = result.get('audit_hash') == expected_audit_hash
+
+            return result
+
         except Exception as e:
             return {
                 'verified': False,
@@ -262,24 +812,10 @@ class SolanaAuditTrail:
         Returns:
             Formatted summary string
         """
-        summary_parts = [
-            "=" * 80,
-            "BLOCKCHAIN AUDIT TRAIL",
-            "=" * 80,
-            f"Document ID: {audit_record['document_id']}",
-            f"Classification: {audit_record['category']}",
-            f"Audit Hash: {audit_record['audit_hash']}",
-            f"Transaction Hash: {audit_record['transaction_hash']}",
-            f"Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime(audit_record['timestamp']))}",
-            f"Cluster: {audit_record['cluster']}",
-            f"Status: {audit_record['status']}",
-        ]
-
-        if 'explorer_url' in audit_record:
-            summary_parts.append(f"Explorer URL: {audit_record['explorer_url']}")
-
-        summary_parts.append("=" * 80)
-        summary_parts.append("\nThis record is cryptographically secured and immutable.")
-        summary_parts.append("The audit hash can be independently verified against the classification data.")
-
-        return "\n".join(summary_parts)
+        fields = dict(
+            audit_record,
+            separator=_SUMMARY_SEPARATOR,
+            time_utc=time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime(audit_record['timestamp'])),
+            explorer_line=f"Explorer URL: {audit_record['explorer_url']}\n" if 'explorer_url' in audit_record else ""
+        )
+        return _SUMMARY_TEMPLATE.format_map(fields)
@@ -2,25 +2,76 @@
 Document Chat Service
 Enables natural language queries about classified documents
 """
+import re
+import time
 import uuid
-from typing import Dict, List, Optional
+import functools
+from collections import deque
+from typing import Dict, Iterator, List, Optional
 from pathlib import Path
-import google.generativeai as genai
 
 from .config import Config
 from .audit_logger import AuditLogger
-from .processing import DocumentProcessor
+from .gemini_client import configure_gemini
+
+
+# Words that route a general query to the document list or the document-selection hint
+_LIST_KEYWORDS = frozenset({'documents', 'files', 'list', 'show', 'available'})
+_LIST_PHRASE = 'what do you have'
+_QUESTION_KEYWORDS = frozenset({
+    'what', 'how', 'why', 'when', 'where', 'who', 'contains',
+    'about', 'explain', 'describe', 'summarize', 'summary'
+})
+_WORD_PATTERN = re.compile(r"[a-z]+")
+
+# Transcript prefix for each chat history role included in the prompt
+_ROLE_PREFIXES = {'user': 'User: ', 'assistant': 'Assistant: '}
+
+
+@functools.lru_cache(maxsize=32)
+def _extract_text_cached(path: str, mtime: float) -> str:
+    """Extract a PDF's full text, memoized per file path and modification time"""
+    # Imported here: the PDF/OCR stack is only needed once a document is discussed
+    from .processing import DocumentProcessor
+    return DocumentProcessor(path).extract_text()
 
 
 class DocumentChatService:
     """Handles chat queries about documents"""
 
+    # Number of documents whose context and system prompt are kept in memory
+    DOCUMENT_CACHE_SIZE = 32
+
+    # Seconds a document context is reused before re-reading the audit database
+    CONTEXT_CACHE_TTL_SECONDS = 60
+
+    # Chat sessions whose recent messages are kept in memory, and messages kept per session
+    SESSION_CACHE_SIZE = 256
+    SESSION_HISTORY_LENGTH = 20
+
+    # Characters per budget token sent to count_tokens when truncating a document;
+    # above any real characters-per-token ratio, so the prefix covers the budget
+    TOKEN_SAMPLE_CHARS_PER_TOKEN = 6
+
     def __init__(self):
         """Initialize chat service"""
-        genai.configure(api_key=Config.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel(Config.GEMINI_MODEL)
         self.audit_logger = AuditLogger()
 
+        # document_id -> (classification fields, text_content, system prompt)
+        self._sys_prompt_cache: Dict[str, tuple] = {}
+
+        # document_id -> (fetched_at, document context)
+        self._context_cache: Dict[str, tuple] = {}
+
+        # session_id -> recent {'role', 'message'} dicts, mirroring chat_history
+        self._session_cache: Dict[str, deque] = {}
+
+    @functools.cached_property
+    def model(self):
+        """Gemini model, configured on first use (google.generativeai is a heavy import)"""
+        genai = configure_gemini()
+        return genai.GenerativeModel(Config.GEMINI_MODEL)
+
     def _get_document_context(self, document_id: str) -> Optional[Dict]:
         """
         Retrieve document content and classification context
@@ -31,6 +82,10 @@ class DocumentChatService:
         Returns:
             Document context dict or None
         """
+        cached = self._context_cache.get(document_id)
+        if cached and time.monotonic() - cached[0] < self.CONTEXT_CACHE_TTL_SECONDS:
+            return cached[1]
+
         # Get classification record
         classification = self.audit_logger.get_classification(document_id)
         if not classification:
@@ -43,16 +98,14 @@ class DocumentChatService:
         if not file_path.exists():
             return None
 
-        # Extract text from PDF
+        # Extract text from PDF (re-parsed only when the file changes)
         try:
-            processor = DocumentProcessor(str(file_path))
-            doc_data = processor.process()
-            text_content = doc_data['full_text']
+            text_content = _extract_text_cached(str(file_path), file_path.stat().st_mtime)
         except Exception as e:
             print(f"Error extracting PDF text: {e}")
             text_content = "[PDF content could not be extracted]"
 
-        return {
+        document_context = {
             'document_id': document_id,
             'file_name': file_name,
             'text_content': text_content,
@@ -69,16 +122,43 @@ class DocumentChatService:
             }
         }
 
+        if document_id not in self._context_cache and len(self._context_cache) >= self.DOCUMENT_CACHE_SIZE:
+            # Evict the oldest entry
+            self._context_cache.pop(next(iter(self._context_cache)), None)
+        self._context_cache[document_id] = (time.monotonic(), document_context)
+
+        return document_context
+
     def _build_system_prompt(self, document_context: Dict) -> str:
         """
         Build system prompt with document context
 
+        The prompt is cached per document and reused on later turns as long as
+        the classification fields and extracted text are unchanged.
+
         Args:
             document_context: Document context dict
 
         Returns:
             System prompt string
         """
+        document_id = document_context['document_id']
+        classification = document_context['classification']
+        text_content = document_context['text_content']
+        fields = (
+            document_context['file_name'],
+            classification['category'],
+            classification['confidence'],
+            classification['reasoning'],
+            classification['citation']
+        )
+
+        cached = self._sys_prompt_cache.get(document_id)
+        if cached and cached[0] == fields and cached[1] == text_content:
+            return cached[2]
+
+        document_text = self._truncate_to_token_budget(text_content)
+
         prompt = f"""You are a helpful AI assistant that answers questions about classified documents.
 
 Document Information:
@@ -88,8 +168,8 @@ Document Information:
 - Classification Reasoning: {document_context['classification']['reasoning']}
 - Key Citation: {document_context['classification']['citation']}
 
-Document Content (First 50,000 characters):
-{document_context['text_content'][:50000]}
+Document Content (First {len(document_text):,} characters):
+{document_text}
 
 Instructions:
 1. Answer questions ONLY based on the document content provided above
@@ -99,8 +179,56 @@ Instructions:
 5. Be concise but thorough in your responses
 6. If asked about classification details, refer to the classification information provided above
 """
+        if document_id not in self._sys_prompt_cache and len(self._sys_prompt_cache) >= self.DOCUMENT_CACHE_SIZE:
+            # Evict the oldest entry
+            self._sys_prompt_cache.pop(next(iter(self._sys_prompt_cache)), None)
+        self._sys_prompt_cache[document_id] = (fields, text_content, prompt)
+
         return prompt
 
+    def _truncate_to_token_budget(self, text: str) -> str:
+        """
+        Truncate document text to about Config.GEMINI_CONTEXT_TOKENS model tokens
+
+        Only a bounded prefix (TOKEN_SAMPLE_CHARS_PER_TOKEN characters per budget
+        token) is measured with the model's own tokenizer (count_tokens), and the
+        cut is scaled from the prefix's characters-per-token ratio; if counting
+        fails, ~4 characters per token is assumed.
+
+        Args:
+            text: Full document text
+
+        Returns:
+            Text that fits the token budget
+        """
+        max_tokens = Config.GEMINI_CONTEXT_TOKENS
+
+        # Cheap bound first: text can't exceed the budget if it is shorter than it in characters
+        if len(text) <= max_tokens:
+            return text
+
+        prefix = text[:max_tokens * self.TOKEN_SAMPLE_CHARS_PER_TOKEN]
+        try:
+            prefix_tokens = self.model.count_tokens(prefix).total_tokens
+        except Exception as e:
+            print(f"Warning: could not count document tokens ({e}), estimating")
+            prefix_tokens = len(prefix) // 4
+
+        if len(prefix) == len(text) and prefix_tokens <= max_tokens:
+            return text
+
+        return text[:len(prefix) * max_tokens // max(prefix_tokens, 1)]
+
+    def invalidate_document(self, document_id: str):
+        """
+        Drop cached data for a document (e.g. after it is re-processed or reviewed)
+
+        Args:
+            document_id: Document identifier
+        """
+        self._sys_prompt_cache.pop(document_id, None)
+        self._context_cache.pop(document_id, None)
+
     def chat(self, message: str, document_id: Optional[str] = None,
              session_id: Optional[str] = None) -> Dict:
         """
@@ -117,9 +245,10 @@ Instructions:
         # Generate session ID if not provided
         if not session_id:
             session_id = str(uuid.uuid4())
+            self._cache_session(session_id, [])
 
         # Log user message
-        self.audit_logger.log_chat_message(
+        self._log_message(
             session_id=session_id,
             role='user',
             message=message,
@@ -140,7 +269,7 @@ Instructions:
             response_text = self._query_general(message, session_id)
 
         # Log assistant response
-        self.audit_logger.log_chat_message(
+        self._log_message(
             session_id=session_id,
             role='assistant',
             message=response_text,
@@ -155,9 +284,167 @@ Instructions:
             'context_used': context_info is not None
         }
 
-    def _query_with_context(self, message: str, document_context: Dict, session_id: str) -> str:
+    def chat_stream(self, message: str, session_id: str,
+                    document_id: Optional[str] = None) -> Iterator[str]:
         """
-        Query with document context
+        Process a chat message, yielding the response text as it is generated
+
+        The assistant message is logged once, with the full text, when the
+        stream ends (or is closed early by the caller).
+
+        Args:
+            message: User message
+            session_id: Session ID for conversation history
+            document_id: Optional document ID for context
+
+        Yields:
+            Chunks of response text
+        """
+        # Log user message
+        self._log_message(
+            session_id=session_id,
+            role='user',
+            message=message,
+            document_id=document_id
+        )
+
+        context_info = None
+        chunks = []
+        try:
+            if document_id:
+                error_prefix = "I encountered an error processing your question"
+                document_context = self._get_document_context(document_id)
+                if not document_context:
+                    chunks.append(f"Document '{document_id}' not found in the system.")
+                    yield chunks[-1]
+                    return
+                context_info = f"Document: {document_context['file_name']}"
+            else:
+                error_prefix = "I encountered an error"
+
+            try:
+                if document_id:
+                    full_prompt = self._build_context_prompt(message, document_context, session_id)
+                else:
+                    reply = self._general_reply(message)
+                    if reply is not None:
+                        chunks.append(reply)
+                        yield reply
+                        return
+                    full_prompt = self._build_general_prompt(message, session_id)
+
+                for chunk in self.model.generate_content(full_prompt, stream=True):
+                    chunks.append(chunk.text)
+                    yield chunk.text
+
+            except Exception as e:
+                print(f"Chat error: {e}")
+                chunks.append(f"{error_prefix}: {str(e)}")
+                yield chunks[-1]
+
+        finally:
+            # Log assistant response
+            self._log_message(
+                session_id=session_id,
+                role='assistant',
+                message="".join(chunks),
+                document_id=document_id,
+                context_used=context_info
+            )
+
+    def _cache_session(self, session_id: str, messages: List) -> deque:
+        """
+        Start caching a session's recent messages
+
+        Args:
+            session_id: Session ID
+            messages: The session's messages so far, oldest first
+
+        Returns:
+            The session's message buffer
+        """
+        if len(self._session_cache) >= self.SESSION_CACHE_SIZE:
+            # Evict the oldest session
+            self._session_cache.pop(next(iter(self._session_cache)), None)
+
+        history = deque(messages, maxlen=self.SESSION_HISTORY_LENGTH)
+        self._session_cache[session_id] = history
+        return history
+
+    def _log_message(self, session_id: str, role: str, message: str,
+                     document_id: Optional[str] = None, context_used: Optional[str] = None):
+        """
+        Log a chat message to the audit database and the session's in-memory history
+
+        Args:
+            session_id: Session ID
+            role: Message role (user/assistant)
+            message: Message content
+            document_id: Optional document ID for context
+            context_used: Optional context information used
+        """
+        self.audit_logger.log_chat_message(
+            session_id=session_id,
+            role=role,
+            message=message,
+            document_id=document_id,
+            context_used=context_used
+        )
+
+        history = self._session_cache.get(session_id)
+        if history is not None:
+            history.append({'role': role, 'message': message})
+
+    def _recent_history(self, session_id: str, limit: int = 10) -> List:
+        """
+        Get a session's most recent messages, from memory when possible
+
+        The audit database is only queried the first time a session is seen by
+        this process (e.g. a conversation resumed after a restart).
+
+        Args:
+            session_id: Session ID
+            limit: Maximum number of messages
+
+        Returns:
+            Messages with 'role' and 'message', oldest first
+        """
+        history = self._session_cache.get(session_id)
+        if history is None:
+            rows = self.audit_logger.get_chat_history(
+                session_id, limit=self.SESSION_HISTORY_LENGTH, latest=True
+            )
+            history = self._cache_session(
+                session_id, [{'role': row['role'], 'message': row['message']} for row in rows]
+            )
+
+        return list(history)[-limit:]
+
+    def clear_caches(self):
+        """Drop all cached documents, prompts and session histories"""
+        self._sys_prompt_cache.clear()
+        self._context_cache.clear()
+        self._session_cache.clear()
+
+    def _format_history(self, chat_history: List) -> List[str]:
+        """
+        Format chat history messages as transcript lines
+
+        Args:
+            chat_history: Chat messages with 'role' and 'message'
+
+        Returns:
+            "User: ..." / "Assistant: ..." lines; other roles are skipped
+        """
+        return [
+            _ROLE_PREFIXES[msg['role']] + msg['message']
+            for msg in chat_history
+            if msg['role'] in _ROLE_PREFIXES
+        ]
+
+    def _build_context_prompt(self, message: str, document_context: Dict, session_id: str) -> str:
+        """
+        Build the full prompt for a question about a document
 
         Args:
             message: User message
@@ -165,30 +452,84 @@ Instructions:
             session_id: Session ID
 
         Returns:
-            Response text
+            Prompt text
         """
-        try:
-            # Build system prompt with document context
-            system_prompt = self._build_system_prompt(document_context)
+        # Build system prompt with document context
+        system_prompt = self._build_system_prompt(document_context)
+
+        # Get recent chat history for this session
+        chat_history = self._recent_history(session_id, limit=10)
+
+        # Build conversation: system prompt, recent history (excluding the last
+        # message, the current user message added fresh), then the current message
+        return "\n\n".join([
+            system_prompt,
+            *self._format_history(chat_history[:-1]),
+            f"User: {message}"
+        ])
+
+    def _build_general_prompt(self, message: str, session_id: str) -> str:
+        """
+        Build the full prompt for a query without document context
+
+        Args:
+            message: User message
+            session_id: Session ID
+
+        Returns:
+            Prompt text
+        """
+        # Get recent chat history
+        chat_history = self._recent_history(session_id, limit=10)
+
+        # Build conversation
+        return "\n\n".join([
+            "You are a helpful AI assistant for a document classification system. "
+            "You can answer questions about documents that have been uploaded and classified. "
+            "Be friendly and guide users to select a document if they're asking document-specific questions.",
+            *self._format_history(chat_history[:-1]),
+            f"User: {message}"
+        ])
+
+    def _general_reply(self, message: str) -> Optional[str]:
+        """
+        Answer general queries that do not need the model
+
+        Args:
+            message: User message
+
+        Returns:
+            Canned response text, or None if the model should answer
+        """
+        lowered = message.lower()
+        words = set(_WORD_PATTERN.findall(lowered))
+
+        # Check if user is asking about available documents
+        if words & _LIST_KEYWORDS or _LIST_PHRASE in lowered:
+            return self._list_available_documents()
 
-            # Get recent chat history for this session
-            chat_history = self.audit_logger.get_chat_history(session_id, limit=10)
+        # Check if user is asking a question that needs a document
+        if words & _QUESTION_KEYWORDS:
+            return self._suggest_document_selection()
 
-            # Build conversation history
-            conversation_parts = [system_prompt]
+        return None
 
-            # Add recent history (exclude the last user message as we'll add it fresh)
-            for msg in chat_history[:-1]:  # Exclude the last message (current user message)
-                if msg['role'] == 'user':
-                    conversation_parts.append(f"User: {msg['message']}")
-                elif msg['role'] == 'assistant':
-                    conversation_parts.append(f"Assistant: {msg['message']}")
+    def _query_with_context(self, message: str, document_context: Dict, session_id: str) -> str:
+        """
+        Query with document context
+
+        Args:
+            message: User message
+            document_context: Document context
+            session_id: Session ID
 
-            # Add current user message
-            conversation_parts.append(f"User: {message}")
+        Returns:
+            Response text
+        """
+        try:
+            full_prompt = self._build_context_prompt(message, document_context, session_id)
 
             # Generate response
-            full_prompt = "\n\n".join(conversation_parts)
             response = self.model.generate_content(full_prompt)
 
             return response.text
@@ -209,34 +550,11 @@ Instructions:
             Response text
         """
         try:
-            # Check if user is asking about available documents
-            if any(keyword in message.lower() for keyword in ['documents', 'files', 'what do you have', 'list', 'show', 'available']):
-                return self._list_available_documents()
-
-            # Check if user is asking a question that needs a document
-            question_keywords = ['what', 'how', 'why', 'when', 'where', 'who', 'contains', 'about', 'explain', 'describe', 'summarize', 'summary']
-            if any(keyword in message.lower() for keyword in question_keywords):
-                return self._suggest_document_selection()
-
-            # Get recent chat history
-            chat_history = self.audit_logger.get_chat_history(session_id, limit=10)
-
-            # Build conversation
-            conversation_parts = [
-                "You are a helpful AI assistant for a document classification system. "
-                "You can answer questions about documents that have been uploaded and classified. "
-                "Be friendly and guide users to select a document if they're asking document-specific questions."
-            ]
-
-            for msg in chat_history[:-1]:
-                if msg['role'] == 'user':
-                    conversation_parts.append(f"User: {msg['message']}")
-                elif msg['role'] == 'assistant':
-                    conversation_parts.append(f"Assistant: {msg['message']}")
-
-            conversation_parts.append(f"User: {message}")
-
-            full_prompt = "\n\n".join(conversation_parts)
+            reply = self._general_reply(message)
+            if reply is not None:
+                return reply
+
+            full_prompt = self._build_general_prompt(message, session_id)
             response = self.model.generate_content(full_prompt)
 
             return response.text
@@ -252,7 +570,10 @@ Instructions:
         Returns:
             Suggestion message
         """
-        classifications = self.audit_logger.get_all_classifications(limit=5)
+        # Three to show, plus one to know whether there are more
+        classifications = self.audit_logger.get_all_classifications(
+            limit=4, fields=['file_name', 'final_category']
+        )
 
         if not classifications:
             return ("📄 **No documents available yet.**\n\n"
@@ -277,7 +598,9 @@ Instructions:
         Returns:
             Formatted list of documents
         """
-        classifications = self.audit_logger.get_all_classifications(limit=20)
+        classifications = self.audit_logger.get_all_classifications(
+            limit=20, fields=['document_id', 'file_name', 'final_category', 'confidence_score']
+        )
 
         if not classifications:
             return "No documents have been classified yet. Please upload a document first."
@@ -304,4 +627,4 @@ Instructions:
         Returns:
             List of messages
         """
-        return self.audit_logger.get_chat_history(session_id)
+        return self.audit_logger.get_chat_history(session_id, as_dicts=True)
@@ -2,11 +2,14 @@
 Classification Accuracy Tracker
 Implements precision/recall metrics and performance monitoring
 """
-import json
+import os
+import threading
 import time
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, deque
+
+import orjson
 
 from ..config import Config
 
@@ -19,24 +22,54 @@ class AccuracyTracker:
     - F1 scores
     - Confusion matrix
     - Confidence calibration
+
+    Each prediction and correction is appended to a JSON-lines event log; the
+    full metrics snapshot is only rewritten every SNAPSHOT_INTERVAL events, and
+    events newer than the snapshot are replayed on startup.
+
+    HITL corrections are kept in full in their own append-only JSON-lines
+    file; the metrics only hold a running count and the most recent ones.
     """
 
+    # Events appended to the log between full snapshots
+    SNAPSHOT_INTERVAL = 100
+
+    # HITL corrections kept in memory (and in the snapshot) for display
+    RECENT_CORRECTIONS = 1000
+
     def __init__(self):
         """Initialize accuracy tracker"""
         self.metrics_file = Config.BASE_DIR / "data" / "accuracy_metrics.json"
+        self.events_file = Config.BASE_DIR / "data" / "accuracy_events.jsonl"
+        self.corrections_file = Config.BASE_DIR / "data" / "hitl_corrections.jsonl"
         self.metrics_file.parent.mkdir(parents=True, exist_ok=True)
+
+        # Sequence number of the last event applied, and of the last one in the snapshot
+        self._event_seq = 0
+        self._snapshot_seq = 0
+
+        # Accuracy, macro F1 and calibration, cleared whenever the counts change
+        self._derived: Dict[str, object] = {}
+
+        # Serializes updates and snapshots; documents can be classified concurrently
+        self._lock = threading.RLock()
+
         self.metrics = self._load_metrics()
+        replayed = self._replay_events()
 
-    def _load_metrics(self) -> Dict:
-        """Load existing metrics"""
-        if self.metrics_file.exists():
-            with open(self.metrics_file, 'r') as f:
-                return json.load(f)
+        # Unbuffered, so every event reaches the file in a single write
+        self._events = open(self.events_file, 'ab', buffering=0)
+        self._corrections = open(self.corrections_file, 'ab', buffering=0)
+        if replayed:
+            self.flush_snapshot()
+
+    def _empty_metrics(self) -> Dict:
+        """Create an empty metrics structure"""
         return {
             'total_predictions': 0,
             'total_ground_truth': 0,
             'confusion_matrix': defaultdict(lambda: defaultdict(int)),
-            'confidence_bins': defaultdict(list),
+            'confidence_bins': defaultdict(lambda: {'correct': 0, 'total': 0}),
             'category_stats': defaultdict(lambda: {
                 'true_positives': 0,
                 'false_positives': 0,
@@ -45,23 +78,128 @@ class AccuracyTracker:
                 'recall': 0.0,
                 'f1_score': 0.0
             }),
-            'hitl_corrections': []
+            'hitl_corrections': deque(maxlen=self.RECENT_CORRECTIONS),
+            'hitl_correction_count': 0
         }
 
-    def _save_metrics(self):
-        """Save metrics to file"""
+    def _load_metrics(self) -> Dict:
+        """Load the last metrics snapshot"""
+        metrics = self._empty_metrics()
+        if not self.metrics_file.exists():
+            return metrics
+
+        with open(self.metrics_file, 'rb') as f:
+            saved = orjson.loads(f.read())
+
+        # Refill the defaultdicts so new categories and bins can still be added
+        metrics['total_predictions'] = saved['total_predictions']
+        metrics['total_ground_truth'] = saved['total_ground_truth']
+        for actual, row in saved['confusion_matrix'].items():
+            metrics['confusion_matrix'][actual].update(row)
+        for bin_str, counts in saved['confidence_bins'].items():
+            if isinstance(counts, list):
+                # Older snapshots kept every prediction in the bin
+                counts = {
+                    'correct': sum(1 for p in counts if p['correct'] is True),
+                    'total': len(counts)
+                }
+            metrics['confidence_bins'][bin_str] = counts
+        metrics['category_stats'].update(saved['category_stats'])
+        metrics['hitl_corrections'].extend(saved['hitl_corrections'])
+        if 'hitl_correction_count' in saved:
+            metrics['hitl_correction_count'] = saved['hitl_correction_count']
+        else:
+            # Older snapshots kept every correction; move them to the corrections file
+            metrics['hitl_correction_count'] = len(saved['hitl_corrections'])
+            if not self.corrections_file.exists():
+                with open(self.corrections_file, 'wb') as f:
+                    f.writelines(orjson.dumps(c) + b'\n' for c in saved['hitl_corrections'])
+
+        self._snapshot_seq = self._event_seq = saved.get('last_event_seq', 0)
+        return metrics
+
+    def _replay_events(self) -> int:
+        """
+        Apply logged events that are newer than the snapshot
+
+        Returns:
+            Number of events replayed
+        """
+        if not self.events_file.exists():
+            return 0
+
+        replayed = 0
+        with open(self.events_file, 'rb') as f:
+            for line in f:
+                try:
+                    event = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # Partial line from an interrupted write
+                    continue
+
+                if event['seq'] <= self._snapshot_seq:
+                    continue
+
+                if event['type'] == 'correction':
+                    self._apply_hitl_correction(event['correction'])
+                else:
+                    self._apply_prediction(event['predicted'], event['ground_truth'],
+                                           event['confidence'], event['document_id'])
+                self._event_seq = event['seq']
+                replayed += 1
+
+        return replayed
+
+    def _append_event(self, event: Dict):
+        """
+        Append an event to the log, snapshotting every SNAPSHOT_INTERVAL events
+
+        Args:
+            event: Event to log (a sequence number is added)
+        """
+        self._event_seq += 1
+        event['seq'] = self._event_seq
+        self._events.write(orjson.dumps(event) + b'\n')
+
+        if self._event_seq - self._snapshot_seq >= self.SNAPSHOT_INTERVAL:
+            self._write_snapshot()
+
+    def flush_snapshot(self):
+        """Write the full metrics snapshot atomically and truncate the event log"""
+        with self._lock:
+            self._write_snapshot()
+
+    def _write_snapshot(self):
+        """Write the snapshot and truncate the event log (lock held)"""
         # Convert defaultdicts to regular dicts for JSON serialization
         serializable = {
             'total_predictions': self.metrics['total_predictions'],
             'total_ground_truth': self.metrics['total_ground_truth'],
             'confusion_matrix': {k: dict(v) for k, v in self.metrics['confusion_matrix'].items()},
-            'confidence_bins': {k: list(v) for k, v in self.metrics['confidence_bins'].items()},
+            'confidence_bins': dict(self.metrics['confidence_bins']),
             'category_stats': dict(self.metrics['category_stats']),
-            'hitl_corrections': self.metrics['hitl_corrections']
+            'hitl_corrections': list(self.metrics['hitl_corrections']),
+            'hitl_correction_count': self.metrics['hitl_correction_count'],
+            'last_event_seq': self._event_seq
         }
 
-        with open(self.metrics_file, 'w') as f:
-            json.dump(serializable, f, indent=2)
+        temp_file = self.metrics_file.with_name(self.metrics_file.name + '.tmp')
+        with open(temp_file, 'wb') as f:
+            f.write(orjson.dumps(serializable, option=orjson.OPT_INDENT_2))
+        os.replace(temp_file, self.metrics_file)
+
+        # Everything logged so far is in the snapshot; events replayed after a
+        # crash before this truncate are skipped by their sequence number
+        self._snapshot_seq = self._event_seq
+        self._events.truncate(0)
+
+    def close(self):
+        """Snapshot the metrics and close the event and correction logs"""
+        with self._lock:
+            if not self._events.closed:
+                self._write_snapshot()
+                self._events.close()
+                self._corrections.close()
 
     def record_prediction(self, predicted: str, ground_truth: Optional[str],
                          confidence: float, document_id: str):
@@ -74,16 +212,28 @@ class AccuracyTracker:
             confidence: Confidence score (0-1)
             document_id: Document identifier
         """
+        with self._lock:
+            self._apply_prediction(predicted, ground_truth, confidence, document_id)
+            self._append_event({
+                'type': 'prediction',
+                'predicted': predicted,
+                'ground_truth': ground_truth,
+                'confidence': confidence,
+                'document_id': document_id
+            })
+
+    def _apply_prediction(self, predicted: str, ground_truth: Optional[str],
+                          confidence: float, document_id: str):
+        """Update the in-memory metrics for a prediction"""
+        self._derived.clear()
         self.metrics['total_predictions'] += 1
 
         # Record confidence bin
         confidence_bin = int(confidence * 10) / 10  # Round to nearest 0.1
-        self.metrics['confidence_bins'][str(confidence_bin)].append({
-            'predicted': predicted,
-            'ground_truth': ground_truth,
-            'correct': predicted == ground_truth if ground_truth else None,
-            'document_id': document_id
-        })
+        counts = self.metrics['confidence_bins'][str(confidence_bin)]
+        counts['total'] += 1
+        if ground_truth and predicted == ground_truth:
+            counts['correct'] += 1
 
         if ground_truth:
             self.metrics['total_ground_truth'] += 1
@@ -91,22 +241,23 @@ class AccuracyTracker:
             # Update confusion matrix
             self.metrics['confusion_matrix'][ground_truth][predicted] += 1
 
-            # Update per-category stats
-            for category in Config.CATEGORIES:
-                if predicted == category and ground_truth == category:
+            # Update per-category stats: only the predicted and actual categories change
+            category_stats = self.metrics['category_stats']
+            changed = {predicted, ground_truth}.intersection(Config.CATEGORIES)
+            if predicted == ground_truth:
+                if ground_truth in changed:
                     # True Positive
-                    self.metrics['category_stats'][category]['true_positives'] += 1
-                elif predicted == category and ground_truth != category:
+                    category_stats[ground_truth]['true_positives'] += 1
+            else:
+                if predicted in changed:
                     # False Positive
-                    self.metrics['category_stats'][category]['false_positives'] += 1
-                elif predicted != category and ground_truth == category:
+                    category_stats[predicted]['false_positives'] += 1
+                if ground_truth in changed:
                     # False Negative
-                    self.metrics['category_stats'][category]['false_negatives'] += 1
+                    category_stats[ground_truth]['false_negatives'] += 1
 
             # Recalculate metrics
-            self._recalculate_metrics()
-
-        self._save_metrics()
+            self._recalculate_metrics(changed)
 
     def record_hitl_correction(self, document_id: str, original: str,
                                corrected: str, confidence: float):
@@ -119,20 +270,35 @@ class AccuracyTracker:
             corrected: SME-corrected category
             confidence: Original confidence score
         """
-        self.metrics['hitl_corrections'].append({
+        correction = {
             'document_id': document_id,
             'original': original,
             'corrected': corrected,
             'confidence': confidence,
             'timestamp': time.time()
-        })
+        }
+        with self._lock:
+            self._corrections.write(orjson.dumps(correction) + b'\n')
+            self._apply_hitl_correction(correction)
+            self._append_event({'type': 'correction', 'correction': correction})
+
+            # Treat correction as ground truth
+            self.record_prediction(original, corrected, confidence, document_id)
 
-        # Treat correction as ground truth
-        self.record_prediction(original, corrected, confidence, document_id)
+    def _apply_hitl_correction(self, correction: Dict):
+        """Count a correction and keep it among the recent ones"""
+        self._derived.clear()
+        self.metrics['hitl_corrections'].append(correction)
+        self.metrics['hitl_correction_count'] += 1
 
-    def _recalculate_metrics(self):
-        """Recalculate precision, recall, and F1 for all categories"""
-        for category in Config.CATEGORIES:
+    def _recalculate_metrics(self, categories: Optional[Iterable[str]] = None):
+        """
+        Recalculate precision, recall, and F1
+
+        Args:
+            categories: Categories whose counts changed (all categories if not given)
+        """
+        for category in Config.CATEGORIES if categories is None else categories:
             stats = self.metrics['category_stats'][category]
             tp = stats['true_positives']
             fp = stats['false_positives']
@@ -167,6 +333,12 @@ class AccuracyTracker:
         Returns:
             Accuracy percentage (0-100)
         """
+        if 'overall_accuracy' not in self._derived:
+            self._derived['overall_accuracy'] = self._compute_overall_accuracy()
+        return self._derived['overall_accuracy']
+
+    def _compute_overall_accuracy(self) -> float:
+        """Compute overall accuracy from the category counts"""
         if self.metrics['total_ground_truth'] == 0:
             return 0.0
 
@@ -184,6 +356,12 @@ class AccuracyTracker:
         Returns:
             Macro F1 score
         """
+        if 'macro_f1' not in self._derived:
+            self._derived['macro_f1'] = self._compute_macro_f1()
+        return self._derived['macro_f1']
+
+    def _compute_macro_f1(self) -> float:
+        """Compute macro F1 from the per-category F1 scores"""
         f1_scores = [
             stats['f1_score']
             for stats in self.metrics['category_stats'].values()
@@ -203,11 +381,17 @@ class AccuracyTracker:
         Returns:
             Dict mapping confidence bins to actual accuracy
         """
+        if 'calibration' not in self._derived:
+            self._derived['calibration'] = self._compute_confidence_calibration()
+        return dict(self._derived['calibration'])
+
+    def _compute_confidence_calibration(self) -> Dict:
+        """Compute calibration from the confidence bin counts"""
         calibration = {}
 
-        for bin_str, predictions in self.metrics['confidence_bins'].items():
-            correct = sum(1 for p in predictions if p['correct'] is True)
-            total = len(predictions)
+        for bin_str, counts in self.metrics['confidence_bins'].items():
+            correct = counts['correct']
+            total = counts['total']
 
             if total > 0:
                 actual_accuracy = correct / total
@@ -244,7 +428,7 @@ class AccuracyTracker:
         if self.metrics['total_predictions'] == 0:
             return 0.0
 
-        corrections = len(self.metrics['hitl_corrections'])
+        corrections = self.metrics['hitl_correction_count']
         return round((corrections / self.metrics['total_predictions']) * 100, 2)
 
     def export_report(self, output_path: Path):
@@ -256,7 +440,7 @@ class AccuracyTracker:
         """
         report = self.get_detailed_report()
 
-        with open(output_path, 'w') as f:
-            json.dump(report, f, indent=2)
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
 
         print(f"Accuracy report exported to: {output_path}")
@@ -2,21 +2,389 @@
 Core Classification Engine with RAG/CAG Pipeline
 Implements the Gemini-centric classifier with dual validation
 """
+import hashlib
 import json
+import logging
+import re
+import threading
 import time
-from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
 import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 
 from ..config import Config
+from ..gemini_client import configure_gemini
 from .policy_rag import PolicyRAG
 
+logger = logging.getLogger(__name__)
+
+
+# Check prompts; the policy context, pass number and document are filled in per call.
+# The response shape is set by the matching schema in _RESPONSE_SCHEMAS.
+_SAFETY_PROMPT = """
+{policy_context}
+
+VALIDATION PASS: {validation_pass}
+
+TASK: Analyze the following document for UNSAFE content.
+
+UNSAFE content includes:
+- Violent, threatening, or harmful content
+- Instructions for illegal activities
+- Malware, exploits, or security vulnerabilities
+- Content promoting harm to individuals or groups
+- Explicitly prohibited content per enterprise policies
+
+DOCUMENT CONTENT:
+{document_content}
+"""
+
+_CONFIDENTIAL_PROMPT = """
+{policy_context}
+
+VALIDATION PASS: {validation_pass}
+
+TASK: Analyze the following document for CONFIDENTIAL content.
+
+CONFIDENTIAL content includes:
+- Trade secrets and proprietary algorithms
+- Financial records and banking information
+- Legal documents under attorney-client privilege
+- Merger & acquisition plans
+- Executive compensation details
+- Source code and intellectual property
+- Customer databases with high-risk PII (SSN, credit cards, medical records)
+
+HIGH-RISK PII PATTERNS:
+- SSN: XXX-XX-XXXX format
+- Credit cards: 16 digits
+- Bank accounts: 8-17 digits
+- Medical record numbers
+- Passport numbers
+
+DOCUMENT CONTENT:
+{document_content}
+"""
+
+_SENSITIVE_PROMPT = """
+{policy_context}
+
+VALIDATION PASS: {validation_pass}
+
+TASK: Analyze the following document for SENSITIVE content.
+
+SENSITIVE content includes:
+- Internal memos and communications
+- Employee contact information
+- Draft documents not for external distribution
+- Internal project plans
+- Budget information (non-executive)
+- Customer feedback and survey data
+- Performance reviews
+
+MEDIUM-RISK PII PATTERNS:
+- Email addresses
+- Phone numbers
+- Physical addresses
+- Employee IDs
+- Dates of birth
+
+DOCUMENT CONTENT:
+{document_content}
+"""
+
+_COMBINED_PROMPT = """
+{policy_context}
+
+VALIDATION PASS: {validation_pass}
+
+TASK: Analyze the following document for UNSAFE, CONFIDENTIAL and SENSITIVE content.
+Assess each of the three independently.
+
+UNSAFE content includes:
+- Violent, threatening, or harmful content
+- Instructions for illegal activities
+- Malware, exploits, or security vulnerabilities
+- Content promoting harm to individuals or groups
+- Explicitly prohibited content per enterprise policies
+
+CONFIDENTIAL content includes:
+- Trade secrets and proprietary algorithms
+- Financial records and banking information
+- Legal documents under attorney-client privilege
+- Merger & acquisition plans
+- Executive compensation details
+- Source code and intellectual property
+- Customer databases with high-risk PII (SSN, credit cards, medical records)
+
+HIGH-RISK PII PATTERNS:
+- SSN: XXX-XX-XXXX format
+- Credit cards: 16 digits
+- Bank accounts: 8-17 digits
+- Medical record numbers
+- Passport numbers
+
+SENSITIVE content includes:
+- Internal memos and communications
+- Employee contact information
+- Draft documents not for external distribution
+- Internal project plans
+- Budget information (non-executive)
+- Customer feedback and survey data
+- Performance reviews
+
+MEDIUM-RISK PII PATTERNS:
+- Email addresses
+- Phone numbers
+- Physical addresses
+- Employee IDs
+- Dates of birth
+
+DOCUMENT CONTENT:
+{document_content}
+"""
+
+
+def _check_schema(flag: str, subject: str, with_pii: bool = True) -> Dict:
+    """Response schema of one check; Gemini's decoder is constrained to it"""
+    properties = {
+        flag: {'type': 'boolean'},
+        'confidence': {'type': 'number', 'description': '0.0-1.0'},
+        'reasoning': {'type': 'string', 'description': 'Detailed explanation citing specific evidence'},
+        'citation': {'type': 'string', 'description': f'Exact quote and location of {subject} content'},
+    }
+    if with_pii:
+        properties['pii_found'] = {'type': 'array', 'items': {'type': 'string'},
+                                   'description': 'PII types detected'}
+    return {'type': 'object', 'properties': properties, 'required': [flag, 'confidence', 'reasoning']}
+
+
+# Response schemas, replacing the JSON examples the prompts used to carry
+_SAFETY_SCHEMA = _check_schema('is_unsafe', 'unsafe', with_pii=False)
+_CONFIDENTIAL_SCHEMA = _check_schema('is_confidential', 'confidential')
+_SENSITIVE_SCHEMA = _check_schema('is_sensitive', 'sensitive')
+_COMBINED_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'safety': _SAFETY_SCHEMA,
+        'confidential': _CONFIDENTIAL_SCHEMA,
+        'sensitive': _SENSITIVE_SCHEMA,
+    },
+    'required': ['safety', 'confidential', 'sensitive'],
+}
+_RESPONSE_SCHEMAS = {
+    'safety': _SAFETY_SCHEMA,
+    'confidential': _CONFIDENTIAL_SCHEMA,
+    'sensitive': _SENSITIVE_SCHEMA,
+    'combined': _COMBINED_SCHEMA,
+}
+
+# Structured PII found locally before any Gemini call (mirrors policies/pii_patterns.json)
+_PII_PATTERNS = {
+    'SSN': re.compile(r'\b\d{3}-\d{2}-\d{4}\b'),
+    # Known issuer prefix, then 13-19 contiguous digits or the 4-4-4-4 / 4-6-5 groupings
+    'Credit Card': re.compile(
+        r'\b(?=4|5[1-5]|2[2-7]|3[0-9]|6(?:011|5|4[4-9]))'
+        r'(?:\d{13,19}|\d{4}([ -])\d{4}\1\d{4}\1\d{4}|\d{4}([ -])\d{6}\2\d{5})\b'
+    ),
+    'Medical Record Number': re.compile(r'\b(?:MRN|medical record)\s*#?:?\s*\d{6,10}\b', re.IGNORECASE),
+    'Email': re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b'),
+    'Phone': re.compile(r'(?<![\d-])(?:\+?1[ .-]?)?(?:\(\d{3}\)|\d{3})[ .-]?\d{3}[ .-]?\d{4}\b'),
+}
+
+# Prescan hits that mark a document CONFIDENTIAL if Gemini misses them
+_HIGH_RISK_PII = ('SSN', 'Credit Card', 'Medical Record Number')
+
+# Confidence of a CONFIDENTIAL result backed only by a local pattern match;
+# kept below Config.CONFIDENCE_THRESHOLD so it goes to HITL review
+_LOCAL_PII_CONFIDENCE = 0.75
+
+
+def _luhn_valid(number: str) -> bool:
+    """Check a card number (separators allowed) against the Luhn checksum"""
+    digits = [int(c) for c in number if c.isdigit()]
+    total = 0
+    for index, digit in enumerate(reversed(digits)):
+        if index % 2:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+
+def _prescan_pii(content: str) -> Dict[str, List[Tuple[int, int]]]:
+    """
+    Find structured PII with the local patterns
+
+    Args:
+        content: Document content
+
+    Returns:
+        Dict of PII type to (start, end) spans; types with no match are omitted
+    """
+    found = {}
+    for pii_type, pattern in _PII_PATTERNS.items():
+        spans = [
+            match.span() for match in pattern.finditer(content)
+            if pii_type != 'Credit Card' or _luhn_valid(match.group())
+        ]
+        if spans:
+            found[pii_type] = spans
+    return found
+
+
+def _chunk(content: str, size: int = 8000, overlap: int = 400) -> Iterator[str]:
+    """
+    Split content into overlapping windows
+
+    Args:
+        content: Document content
+        size: Characters per window
+        overlap: Characters shared by consecutive windows, so text on a
+            boundary appears whole in at least one of them
+
+    Yields:
+        Windows in document order
+    """
+    step = max(size - overlap, 1)
+    for start in range(0, max(len(content) - overlap, 1), step):
+        yield content[start:start + size]
+
+
+class _Check(NamedTuple):
+    """One step of the classification ladder"""
+    key: str               # Member of the combined response
+    name: str              # Key in step_results
+    flag: str              # Field that is true when the check fires
+    category: str          # Category assigned when it fires
+    default_citation: str  # Citation used when the response has none
+    method: str            # Individual check method (fallback)
+
+
+# The ladder in priority order: the first check that fires decides the category
+_COMBINED_CHECKS = (
+    _Check('safety', 'safety_check', 'is_unsafe', 'UNSAFE',
+           'Safety violation detected', '_check_safety'),
+    _Check('confidential', 'confidential_check', 'is_confidential', 'CONFIDENTIAL',
+           'Confidential content detected', '_check_confidential'),
+    _Check('sensitive', 'sensitive_check', 'is_sensitive', 'SENSITIVE',
+           'Sensitive content detected', '_check_sensitive'),
+)
+_COMBINED_KEYS = frozenset(check.key for check in _COMBINED_CHECKS)
+
+
+def _validate_check_result(check: str, result) -> None:
+    """
+    Make sure a parsed response has the fields the ladder reads
+
+    A combined response may end after its first positive check (a streamed
+    response stops there), but every check up to that one must be present.
+
+    Args:
+        check: Response schema used ('safety', 'confidential', 'sensitive' or 'combined')
+        result: Parsed response
+
+    Raises:
+        ValueError: If a check or its flag/confidence is missing
+    """
+    ladder = _COMBINED_CHECKS if check == 'combined' else [c for c in _COMBINED_CHECKS if c.key == check]
+    for ladder_check in ladder:
+        check_result = result.get(ladder_check.key) if check == 'combined' else result
+        if check_result is None:
+            raise ValueError("Combined response is incomplete")
+        if (not isinstance(check_result, dict) or ladder_check.flag not in check_result
+                or 'confidence' not in check_result):
+            raise ValueError(f"{ladder_check.name} missing from response")
+        if check_result[ladder_check.flag]:
+            return
+
+
+_json_decoder = json.JSONDecoder()
+_json_whitespace = re.compile(r'[ \t\n\r]*')
+
+
+def _decode_members(text: str, start: int = 0) -> Tuple[Dict, int]:
+    """
+    Decode the complete top-level members of a possibly incomplete JSON object
+
+    Scans member by member, so a key name quoted inside an earlier string
+    value is never mistaken for a member.
+
+    Args:
+        text: JSON text received so far
+        start: Offset returned by the previous call (0 for the opening brace)
+
+    Returns:
+        The members decoded from start on, and the offset to resume from
+    """
+    members = {}
+    pos = start
+    while True:
+        i = _json_whitespace.match(text, pos).end()
+        if i >= len(text) or text[i] not in '{,':
+            break
+        i = _json_whitespace.match(text, i + 1).end()
+        try:
+            key, i = _json_decoder.raw_decode(text, i)
+            i = _json_whitespace.match(text, i).end()
+            if not text.startswith(':', i):
+                break
+            value, i = _json_decoder.raw_decode(text, _json_whitespace.match(text, i + 1).end())
+        except json.JSONDecodeError:
+            break
+        # A value is only complete once the next separator has arrived
+        # (a number could still have more digits to come)
+        if _json_whitespace.match(text, i).end() >= len(text):
+            break
+        members[key] = value
+        pos = i
+    return members, pos
+
+
+def _close_stream(response):
+    """
+    Stop a streaming response that is no longer being read
+
+    Cancels the underlying stream where the transport allows it, so the
+    HTTP/gRPC call does not stay open; otherwise reads it to the end.
+    """
+    iterator = getattr(response, '_iterator', None)
+    for name in ('cancel', 'close'):
+        closer = getattr(iterator, name, None)
+        if callable(closer):
+            closer()
+            return
+    resolve = getattr(response, 'resolve', None)
+    if callable(resolve):
+        resolve()
+
 
 class GeminiClassifier:
     """
     Gemini-based document classifier with RAG (policy) and CAG (document caching)
     """
 
+    # Concurrent Gemini check calls (individual checks for each of two validation passes)
+    CHECK_WORKERS = 6
+
+    # Documents classify_batch keeps in flight at once
+    BATCH_CONCURRENCY = 16
+
+    # Second validation passes running alongside the first (one per document in flight)
+    PASS_WORKERS = BATCH_CONCURRENCY
+
+    # Windows of a long document checked at once
+    CHUNK_WORKERS = 8
+
+    # Parsed check responses kept for re-classification of the same document
+    CHECK_CACHE_SIZE = 1024
+
+    # UTF-8 bytes of distinct document content kept by cache_document
+    DOCUMENT_CACHE_MAX_BYTES = 256 << 20
+
     def __init__(self, policy_rag: PolicyRAG):
         """
         Initialize classifier
@@ -24,7 +392,7 @@ class GeminiClassifier:
         Args:
             policy_rag: PolicyRAG instance for knowledge base access
         """
-        genai.configure(api_key=Config.GEMINI_API_KEY)
+        configure_gemini()
         self.policy_rag = policy_rag
         self.model_name = Config.GEMINI_MODEL
 
@@ -40,13 +408,54 @@ class GeminiClassifier:
         )
 
         self.policy_file_uri = None
-        self.cached_content = {}
+
+        # LRU of document ID -> content digest; identical content is stored once
+        # in _content_by_digest as [content, size in bytes, referencing documents]
+        self.cached_content: "OrderedDict[str, str]" = OrderedDict()
+        self._content_by_digest: Dict[str, list] = {}
+        self._cached_bytes = 0
+        self._document_cache_lock = threading.Lock()
+
+        # The safety, confidential and sensitive checks are independent
+        # network calls, so they are issued together
+        self._check_executor = ThreadPoolExecutor(max_workers=self.CHECK_WORKERS,
+                                                  thread_name_prefix="gemini-check")
+
+        # Separate pool for whole passes: a pass waits on its checks, so sharing
+        # the check pool could leave every worker blocked on queued checks
+        self._pass_executor = ThreadPoolExecutor(max_workers=self.PASS_WORKERS,
+                                                 thread_name_prefix="gemini-pass")
+
+        # Documents of classify_batch calls; kept for the classifier's lifetime
+        # so batches don't start and join their own threads
+        self._batch_executor = ThreadPoolExecutor(max_workers=self.BATCH_CONCURRENCY,
+                                                  thread_name_prefix="gemini-batch")
+
+        # Windows of a long document; their checks may fall back to the check pool
+        self._chunk_executor = ThreadPoolExecutor(max_workers=self.CHUNK_WORKERS,
+                                                  thread_name_prefix="gemini-chunk")
+
+        # Check responses keyed by a digest of the full prompt and the temperature
+        self._check_cache: "OrderedDict[Tuple[str, float], Dict]" = OrderedDict()
+        self._check_cache_lock = threading.Lock()
+
+        # Generation settings per (check, validation pass): pass 1 is near-deterministic,
+        # pass 2 samples a little more freely so the passes are independent
+        self._generation_configs = {
+            (check, validation_pass): genai.GenerationConfig(
+                temperature=temperature,
+                response_mime_type="application/json",
+                response_schema=schema
+            )
+            for check, schema in _RESPONSE_SCHEMAS.items()
+            for validation_pass, temperature in ((1, 0.1), (2, 0.3))
+        }
 
     def initialize_rag(self):
         """Initialize RAG by uploading policy documents"""
-        print("Initializing Policy RAG...")
+        logger.info("Initializing Policy RAG...")
         self.policy_file_uri = self.policy_rag.upload_policy_to_gemini()
-        print("Policy RAG initialized successfully")
+        logger.info("Policy RAG initialized successfully")
 
     def cache_document(self, document_data: Dict) -> str:
         """
@@ -61,12 +470,57 @@ class GeminiClassifier:
         document_id = document_data['document_id']
         cached_content = document_data['cached_content']
 
+        encoded = cached_content.encode('utf-8')
+        digest = hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
         # Store in memory cache (Gemini API caching happens automatically with context)
-        self.cached_content[document_id] = cached_content
+        with self._document_cache_lock:
+            self._uncache_document(document_id)
+            self.cached_content[document_id] = digest
+
+            entry = self._content_by_digest.get(digest)
+            if entry is None:
+                self._content_by_digest[digest] = [cached_content, len(encoded), 1]
+                self._cached_bytes += len(encoded)
+            else:
+                entry[2] += 1
+
+            # Evict least recently cached documents, but always keep this one
+            while self._cached_bytes > self.DOCUMENT_CACHE_MAX_BYTES and len(self.cached_content) > 1:
+                self._uncache_document(next(iter(self.cached_content)))
 
-        print(f"Document {document_id} cached ({len(cached_content)} characters)")
+        logger.debug("Document %s cached (%d characters)", document_id, len(cached_content))
         return document_id
 
+    def _uncache_document(self, document_id: str):
+        """Remove a document from the cache, dropping its content once no document refers to it"""
+        digest = self.cached_content.pop(document_id, None)
+        if digest is None:
+            return
+
+        entry = self._content_by_digest[digest]
+        entry[2] -= 1
+        if entry[2] == 0:
+            del self._content_by_digest[digest]
+            self._cached_bytes -= entry[1]
+
+    def get_cached_document(self, document_id: str) -> Optional[str]:
+        """
+        Get cached document content
+
+        Args:
+            document_id: Document identifier
+
+        Returns:
+            Cached content, or None if the document is not cached
+        """
+        with self._document_cache_lock:
+            digest = self.cached_content.get(document_id)
+            if digest is None:
+                return None
+            self.cached_content.move_to_end(document_id)
+            return self._content_by_digest[digest][0]
+
     def classify(self, document_data: Dict, use_dual_validation: bool = True) -> Dict:
         """
         Classify document using RAG/CAG pipeline
@@ -84,9 +538,26 @@ class GeminiClassifier:
         self.cache_document(document_data)
 
         if use_dual_validation and Config.DUAL_VALIDATION_ENABLED:
-            print("Using dual-layer validation...")
-            result1 = self._classify_single(document_data, validation_pass=1)
-            result2 = self._classify_single(document_data, validation_pass=2)
+            logger.debug("Using dual-layer validation...")
+            if Config.DUAL_SKIP_ENABLED:
+                # Pass 2 only runs when pass 1 lands in the ambiguous confidence band
+                result1 = self._classify_single(document_data, validation_pass=1)
+                confidence = result1['confidence_score']
+
+                if confidence >= Config.DUAL_SKIP_HIGH or confidence <= Config.DUAL_SKIP_LOW:
+                    logger.debug("Pass 1 confidence %.2f outside ambiguity band - skipping pass 2", confidence)
+                    result1['hitl_status'] = 'REQUIRES_REVIEW' if confidence < Config.CONFIDENCE_THRESHOLD else 'AUTO_APPROVED'
+                    result1['validation_consensus'] = None
+                    result1['validation_skipped'] = True
+                    result1['dual_validation_results'] = {'pass1': confidence}
+                    return result1
+
+                result2 = self._classify_single(document_data, validation_pass=2)
+            else:
+                # The passes are independent; run pass 2 in the background while pass 1 runs here
+                pass2_future = self._pass_executor.submit(self._classify_single, document_data, 2)
+                result1 = self._classify_single(document_data, validation_pass=1)
+                result2 = pass2_future.result()
 
             # Consensus logic
             if (result1['final_category'] == result2['final_category'] and
@@ -99,7 +570,7 @@ class GeminiClassifier:
                     'pass1': result1['confidence_score'],
                     'pass2': result2['confidence_score']
                 }
-                print(f"Dual validation consensus: {result1['final_category']} (Auto-approved)")
+                logger.info("Dual validation consensus: %s (Auto-approved)", result1['final_category'])
                 return result1
             else:
                 result1['hitl_status'] = 'REQUIRES_REVIEW'
@@ -108,7 +579,7 @@ class GeminiClassifier:
                     'pass1': {'category': result1['final_category'], 'confidence': result1['confidence_score']},
                     'pass2': {'category': result2['final_category'], 'confidence': result2['confidence_score']}
                 }
-                print(f"Dual validation mismatch - requires HITL review")
+                logger.info("Dual validation mismatch - requires HITL review")
                 return result1
         else:
             result = self._classify_single(document_data, validation_pass=1)
@@ -116,6 +587,32 @@ class GeminiClassifier:
             result['validation_consensus'] = None
             return result
 
+    def classify_batch(self, documents: List[Dict], use_dual_validation: bool = True,
+                       max_concurrency: Optional[int] = None) -> List[Dict]:
+        """
+        Classify several documents concurrently
+
+        Each document goes through classify(); up to max_concurrency of them
+        wait on Gemini at the same time, all sharing the uploaded policy.
+
+        Args:
+            documents: Processed document data for each document
+            use_dual_validation: Whether to use dual-layer validation
+            max_concurrency: Documents classified at once (at most BATCH_CONCURRENCY, the default)
+
+        Returns:
+            Classification results, in the same order as the input
+        """
+        # Submission blocks while max_concurrency documents are in flight
+        slots = threading.Semaphore(max_concurrency or self.BATCH_CONCURRENCY)
+        futures = []
+        for document_data in documents:
+            slots.acquire()
+            future = self._batch_executor.submit(self.classify, document_data, use_dual_validation)
+            future.add_done_callback(lambda _: slots.release())
+            futures.append(future)
+        return [future.result() for future in futures]
+
     def _classify_single(self, document_data: Dict, validation_pass: int = 1) -> Dict:
         """
         Perform single classification pass
@@ -128,7 +625,7 @@ class GeminiClassifier:
             Classification result
         """
         document_id = document_data['document_id']
-        cached_content = self.cached_content.get(document_id, document_data['cached_content'])
+        cached_content = self.get_cached_document(document_id) or document_data['cached_content']
 
         # Build the prompt tree
         results = {
@@ -136,50 +633,46 @@ class GeminiClassifier:
             'validation_pass': validation_pass
         }
 
-        # Step 1: Safety Check (always first)
-        safety_result = self._check_safety(cached_content, validation_pass)
-        results['safety_check'] = safety_result
-
-        if safety_result['is_unsafe']:
-            return {
-                'document_id': document_id,
-                'final_category': 'UNSAFE',
-                'confidence_score': safety_result['confidence'],
-                'reasoning_summary': safety_result['reasoning'],
-                'citation_snippet': safety_result.get('citation', 'Safety violation detected'),
-                'step_results': results,
-                'validation_pass': validation_pass
-            }
-
-        # Step 2: Confidential Check
-        confidential_result = self._check_confidential(cached_content, validation_pass)
-        results['confidential_check'] = confidential_result
-
-        if confidential_result['is_confidential']:
-            return {
-                'document_id': document_id,
-                'final_category': 'CONFIDENTIAL',
-                'confidence_score': confidential_result['confidence'],
-                'reasoning_summary': confidential_result['reasoning'],
-                'citation_snippet': confidential_result.get('citation', 'Confidential content detected'),
-                'step_results': results,
-                'validation_pass': validation_pass
+        pii = _prescan_pii(cached_content)
+        high_risk = [pii_type for pii_type in _HIGH_RISK_PII if pii_type in pii]
+
+        # All three checks come back together; they are still applied in
+        # priority order, so the first positive check decides the category
+        checks = self._run_chunked(self._run_checks, cached_content, validation_pass)
+
+        if pii:
+            # PII found locally is reported even if Gemini missed it
+            for name in ('confidential_check', 'sensitive_check'):
+                if name in checks:
+                    reported = checks[name].get('pii_found') or []
+                    checks[name] = {**checks[name], 'pii_found': reported + [t for t in pii if t not in reported]}
+
+        if high_risk and 'confidential_check' in checks and not checks['confidential_check']['is_confidential']:
+            # A local match alone is a hint, not proof: flag it for review
+            # rather than letting it auto-approve
+            start, end = pii[high_risk[0]][0]
+            checks['confidential_check'] = {
+                **checks['confidential_check'],
+                'is_confidential': True,
+                'confidence': _LOCAL_PII_CONFIDENCE,
+                'reasoning': f"Local pattern match found high-risk PII: {', '.join(high_risk)}",
+                'citation': cached_content[start:end]
             }
 
-        # Step 3: Sensitive Check
-        sensitive_result = self._check_sensitive(cached_content, validation_pass)
-        results['sensitive_check'] = sensitive_result
-
-        if sensitive_result['is_sensitive']:
-            return {
-                'document_id': document_id,
-                'final_category': 'SENSITIVE',
-                'confidence_score': sensitive_result['confidence'],
-                'reasoning_summary': sensitive_result['reasoning'],
-                'citation_snippet': sensitive_result.get('citation', 'Sensitive content detected'),
-                'step_results': results,
-                'validation_pass': validation_pass
-            }
+        for check in _COMBINED_CHECKS:
+            check_result = checks[check.name]
+            results[check.name] = check_result
+
+            if check_result[check.flag]:
+                return {
+                    'document_id': document_id,
+                    'final_category': check.category,
+                    'confidence_score': check_result['confidence'],
+                    'reasoning_summary': check_result['reasoning'],
+                    'citation_snippet': check_result.get('citation', check.default_citation),
+                    'step_results': results,
+                    'validation_pass': validation_pass
+                }
 
         # Default: PUBLIC
         return {
@@ -192,151 +685,206 @@ class GeminiClassifier:
             'validation_pass': validation_pass
         }
 
-    def _check_safety(self, document_content: str, validation_pass: int) -> Dict:
-        """Check for unsafe content"""
-        prompt = f"""
-{self.policy_rag.get_policy_context()}
+    def _run_chunked(self, run: Callable[[str, int], Dict[str, Dict]],
+                     document_content: str, validation_pass: int) -> Dict[str, Dict]:
+        """
+        Run checks over a document, in parallel windows if it is long
 
-VALIDATION PASS: {validation_pass}
+        Each check keeps its most severe window: a positive result beats a
+        negative one, then higher confidence wins. The ladder then picks the
+        most severe category, and its citation comes from the window that fired.
 
-TASK: Analyze the following document for UNSAFE content.
+        Args:
+            run: Function returning check results for (content, validation_pass)
+            document_content: Document content to check
+            validation_pass: Validation pass number
 
-UNSAFE content includes:
-- Violent, threatening, or harmful content
-- Instructions for illegal activities
-- Malware, exploits, or security vulnerabilities
-- Content promoting harm to individuals or groups
-- Explicitly prohibited content per enterprise policies
+        Returns:
+            Check results keyed like those returned by run
+        """
+        if len(document_content) <= Config.CHUNK_THRESHOLD:
+            return run(document_content, validation_pass)
+
+        futures = [
+            self._chunk_executor.submit(run, chunk, validation_pass)
+            for chunk in _chunk(document_content, Config.CHUNK_SIZE, Config.CHUNK_OVERLAP)
+        ]
+        chunk_results = [future.result() for future in futures]
+        logger.debug("Checked %d windows of %d characters", len(chunk_results), len(document_content))
+
+        merged = {}
+        for check in _COMBINED_CHECKS:
+            results = [result[check.name] for result in chunk_results if check.name in result]
+            if results:
+                merged[check.name] = max(results, key=lambda r: (bool(r[check.flag]), r['confidence']))
+        return merged
+
+    def _run_checks(self, document_content: str, validation_pass: int) -> Dict[str, Dict]:
+        """
+        Run the safety, confidential and sensitive checks for one pass
 
-DOCUMENT CONTENT:
-{document_content}
+        Uses a single combined Gemini call; if that fails or its response is
+        missing a check, the three individual checks are run concurrently.
 
-Respond in JSON format:
-{{
-    "is_unsafe": true/false,
-    "confidence": 0.0-1.0,
-    "reasoning": "Detailed explanation",
-    "citation": "Exact quote and location if unsafe content found"
-}}
-"""
+        Args:
+            document_content: Document content to check
+            validation_pass: Validation pass number
 
+        Returns:
+            Dict with safety_check, confidential_check and sensitive_check results
+        """
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.1 if validation_pass == 1 else 0.3,
-                    response_mime_type="application/json"
-                )
-            )
-
-            result = json.loads(response.text)
-            return result
+            return self._check_all(document_content, validation_pass)
         except Exception as e:
-            print(f"Safety check error: {e}")
-            return {'is_unsafe': False, 'confidence': 0.5, 'reasoning': f'Error: {e}', 'citation': ''}
+            logger.warning("Combined check error: %s - running individual checks", e)
 
-    def _check_confidential(self, document_content: str, validation_pass: int) -> Dict:
-        """Check for confidential content"""
-        prompt = f"""
-{self.policy_rag.get_policy_context()}
+        futures = {
+            check.name: self._check_executor.submit(getattr(self, check.method), document_content, validation_pass)
+            for check in _COMBINED_CHECKS
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+    def _check_all(self, document_content: str, validation_pass: int) -> Dict[str, Dict]:
+        """Check for unsafe, confidential and sensitive content in one call"""
+        prompt = _COMBINED_PROMPT.format(
+            policy_context=self.policy_rag.get_policy_context(),
+            validation_pass=validation_pass,
+            document_content=document_content
+        )
 
-VALIDATION PASS: {validation_pass}
+        result = self._run_check(prompt, validation_pass, 'combined', streaming=True)
 
-TASK: Analyze the following document for CONFIDENTIAL content.
+        # _run_check has validated the checks up to the first positive one,
+        # which is all the priority ladder reads
+        checks = {}
+        for check in _COMBINED_CHECKS:
+            check_result = result[check.key]
+            checks[check.name] = dict(check_result, reasoning=check_result.get('reasoning', ''))
+            if check_result[check.flag]:
+                break
+        return checks
 
-CONFIDENTIAL content includes:
-- Trade secrets and proprietary algorithms
-- Financial records and banking information
-- Legal documents under attorney-client privilege
-- Merger & acquisition plans
-- Executive compensation details
-- Source code and intellectual property
-- Customer databases with high-risk PII (SSN, credit cards, medical records)
+    def _read_combined_stream(self, response) -> Dict:
+        """
+        Read a streamed combined-check response, stopping at the first positive check
 
-HIGH-RISK PII PATTERNS:
-- SSN: XXX-XX-XXXX format
-- Credit cards: 16 digits
-- Bank accounts: 8-17 digits
-- Medical record numbers
-- Passport numbers
+        Args:
+            response: Streaming generate_content response
 
-DOCUMENT CONTENT:
-{document_content}
+        Returns:
+            Parsed response; only the checks up to the first positive one if it stopped early
+        """
+        text = ''
+        pos = 0
+        decided = {}
+
+        for chunk in response:
+            if not chunk.parts:
+                continue
+            text += chunk.text
+
+            # Decode each check object as soon as it is complete; the schema
+            # does not fix the order they arrive in
+            members, pos = _decode_members(text, pos)
+            for key, value in members.items():
+                if key in _COMBINED_KEYS and isinstance(value, dict):
+                    decided[key] = value
+
+            # Stop once the ladder is settled: every higher-priority check is
+            # negative and this one is positive
+            for check in _COMBINED_CHECKS:
+                check_result = decided.get(check.key)
+                if check_result is None:
+                    break
+                if check_result.get(check.flag):
+                    logger.debug("Combined check: %s positive - not waiting for the rest of the response", check.key)
+                    _close_stream(response)
+                    return decided
+
+        return json.loads(text)
+
+    def _run_check(self, prompt: str, validation_pass: int, check: str, streaming: bool = False) -> Dict:
+        """
+        Send a check prompt to Gemini and parse its JSON response
 
-Respond in JSON format:
-{{
-    "is_confidential": true/false,
-    "confidence": 0.0-1.0,
-    "reasoning": "Detailed explanation citing specific evidence",
-    "citation": "Exact quote and location of confidential content",
-    "pii_found": ["list of PII types detected"]
-}}
-"""
+        Identical prompts at the same temperature (re-classifying a document
+        under the same policy) are answered from the check cache.
 
-        try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.1 if validation_pass == 1 else 0.3,
-                    response_mime_type="application/json"
-                )
-            )
+        Args:
+            prompt: Fully formatted check prompt
+            validation_pass: Validation pass number (sets the temperature)
+            check: Response schema to use ('safety', 'confidential', 'sensitive' or 'combined')
+            streaming: Stream a combined-check response and stop at the first positive check
 
+        Returns:
+            Parsed check result
+        """
+        generation_config = self._generation_configs[(check, 1 if validation_pass == 1 else 2)]
+        key = (hashlib.blake2b(prompt.encode('utf-8'), digest_size=16).hexdigest(), generation_config.temperature)
+
+        with self._check_cache_lock:
+            cached = self._check_cache.get(key)
+            if cached is not None:
+                self._check_cache.move_to_end(key)
+                return dict(cached)
+
+        if streaming:
+            response = self.model.generate_content(prompt, generation_config=generation_config, stream=True)
+            result = self._read_combined_stream(response)
+        else:
+            response = self.model.generate_content(prompt, generation_config=generation_config)
             result = json.loads(response.text)
-            return result
-        except Exception as e:
-            print(f"Confidential check error: {e}")
-            return {'is_confidential': False, 'confidence': 0.5, 'reasoning': f'Error: {e}', 'citation': '', 'pii_found': []}
-
-    def _check_sensitive(self, document_content: str, validation_pass: int) -> Dict:
-        """Check for sensitive content"""
-        prompt = f"""
-{self.policy_rag.get_policy_context()}
 
-VALIDATION PASS: {validation_pass}
+        # Only well-formed results are cached; a bad one raises and is retried next time
+        if not isinstance(result, dict):
+            raise ValueError(f"{check} response is not a JSON object")
+        _validate_check_result(check, result)
 
-TASK: Analyze the following document for SENSITIVE content.
+        with self._check_cache_lock:
+            self._check_cache[key] = result
+            if len(self._check_cache) > self.CHECK_CACHE_SIZE:
+                self._check_cache.popitem(last=False)
 
-SENSITIVE content includes:
-- Internal memos and communications
-- Employee contact information
-- Draft documents not for external distribution
-- Internal project plans
-- Budget information (non-executive)
-- Customer feedback and survey data
-- Performance reviews
+        return dict(result)
 
-MEDIUM-RISK PII PATTERNS:
-- Email addresses
-- Phone numbers
-- Physical addresses
-- Employee IDs
-- Dates of birth
+    def _check_safety(self, document_content: str, validation_pass: int) -> Dict:
+        """Check for unsafe content"""
+        prompt = _SAFETY_PROMPT.format(
+            policy_context=self.policy_rag.get_policy_context(),
+            validation_pass=validation_pass,
+            document_content=document_content
+        )
 
-DOCUMENT CONTENT:
-{document_content}
+        try:
+            return self._run_check(prompt, validation_pass, 'safety')
+        except Exception as e:
+            logger.exception("Safety check error")
+            return {'is_unsafe': False, 'confidence': 0.5, 'reasoning': f'Error: {e}', 'citation': ''}
 
-Respond in JSON format:
-{{
-    "is_sensitive": true/false,
-    "confidence": 0.0-1.0,
-    "reasoning": "Detailed explanation citing specific evidence",
-    "citation": "Exact quote and location of sensitive content",
-    "pii_found": ["list of PII types detected"]
-}}
-"""
+    def _check_confidential(self, document_content: str, validation_pass: int) -> Dict:
+        """Check for confidential content"""
+        prompt = _CONFIDENTIAL_PROMPT.format(
+            policy_context=self.policy_rag.get_policy_context(),
+            validation_pass=validation_pass,
+            document_content=document_content
+        )
 
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.1 if validation_pass == 1 else 0.3,
-                    response_mime_type="application/json"
-                )
-            )
+            return self._run_check(prompt, validation_pass, 'confidential')
+        except Exception as e:
+            logger.exception("Confidential check error")
+            return {'is_confidential': False, 'confidence': 0.5, 'reasoning': f'Error: {e}', 'citation': '', 'pii_found': []}
 
-            result = json.loads(response.text)
-            return result
+    def _check_sensitive(self, document_content: str, validation_pass: int) -> Dict:
+        """Check for sensitive content"""
+        prompt = _SENSITIVE_PROMPT.format(
+            policy_context=self.policy_rag.get_policy_context(),
+            validation_pass=validation_pass,
+            document_content=document_content
+        )
+
+        try:
+            return self._run_check(prompt, validation_pass, 'sensitive')
         except Exception as e:
-            print(f"Sensitive check error: {e}")
+            logger.exception("Sensitive check error")
             return {'is_sensitive': False, 'confidence': 0.5, 'reasoning': f'Error: {e}', 'citation': '', 'pii_found': []}
@@ -2,8 +2,11 @@
 Enhanced Classifier with Accuracy Tracking and Advanced Safety
 Wrapper around GeminiClassifier with competition-winning features
 """
+import logging
+import threading
 import time
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 import re
 
 from .classifier import GeminiClassifier
@@ -12,6 +15,11 @@ from .content_safety import ContentSafetyValidator
 from .policy_rag import PolicyRAG
 from ..config import Config
 
+logger = logging.getLogger(__name__)
+
+# Stats of a category with no tracked predictions yet (shared, never modified)
+_NO_STATS: Dict = {}
+
 
 class EnhancedGeminiClassifier:
     """
@@ -22,6 +30,9 @@ class EnhancedGeminiClassifier:
     - Better citations and region mapping (10% - UX)
     """
 
+    # Documents classify_batch keeps in flight at once
+    BATCH_CONCURRENCY = 8
+
     def __init__(self, policy_rag: PolicyRAG):
         """Initialize enhanced classifier"""
         self.base_classifier = GeminiClassifier(policy_rag)
@@ -29,17 +40,24 @@ class EnhancedGeminiClassifier:
         self.safety_validator = ContentSafetyValidator()
         self.policy_rag = policy_rag
 
+        # Documents of classify_batch calls; kept for the classifier's lifetime
+        # so batches don't start and join their own threads
+        self._batch_executor = ThreadPoolExecutor(max_workers=self.BATCH_CONCURRENCY,
+                                                  thread_name_prefix="enhanced-batch")
+
     def initialize_rag(self):
         """Initialize RAG"""
         self.base_classifier.initialize_rag()
 
-    def classify(self, document_data: Dict, ground_truth: Optional[str] = None) -> Dict:
+    def classify(self, document_data: Dict, ground_truth: Optional[str] = None,
+                 pattern_results: Optional[Dict] = None) -> Dict:
         """
         Enhanced classification with all competition features
 
         Args:
             document_data: Processed document data
             ground_truth: Optional ground truth for accuracy tracking
+            pattern_results: Safety pattern check result, if already scanned in a batch
 
         Returns:
             Enhanced classification result
@@ -47,21 +65,20 @@ class EnhancedGeminiClassifier:
         start_time = time.time()
         document_id = document_data['document_id']
 
-        print(f"\n{'='*80}")
-        print(f"ENHANCED CLASSIFICATION - Document: {document_id}")
-        print(f"{'='*80}\n")
+        logger.debug("Enhanced classification - document %s", document_id)
 
         # Step 1: Enhanced Content Safety Check (FIRST - highest priority)
-        print("Step 1/5: Advanced Content Safety Validation...")
+        logger.debug("Step 1/5: Advanced Content Safety Validation...")
         safety_result = self.safety_validator.validate(
             document_data['full_text'],
-            document_id
+            document_id,
+            pattern_results
         )
 
         # If unsafe, immediately return UNSAFE classification
         if not safety_result['is_safe']:
-            print("⚠️  UNSAFE CONTENT DETECTED - Blocking classification")
-            print(self.safety_validator.get_safety_report(safety_result))
+            logger.warning("Unsafe content detected in %s - blocking classification (%s)",
+                           document_id, ', '.join(safety_result['categories_flagged']))
 
             result = {
                 'document_id': document_id,
@@ -92,35 +109,38 @@ class EnhancedGeminiClassifier:
 
             return result
 
-        print("✓ Content safety validation passed")
-        print(f"  Child Safe: {'Yes' if safety_result['child_safe'] else 'No'}")
-        print(f"  Safety Score: {safety_result['safety_score']:.2%}\n")
+        logger.debug("Content safety validation passed (child safe: %s, safety score: %.2f)",
+                     safety_result['child_safe'], safety_result['safety_score'])
 
         # Step 2: Dual-LLM Classification with Enhanced Consensus
-        print("Step 2/5: Dual-LLM Classification with Enhanced Consensus...")
+        logger.debug("Step 2/5: Dual-LLM Classification with Enhanced Consensus...")
         result = self.base_classifier.classify(document_data, use_dual_validation=True)
 
         # Step 3: Enhanced Citation Extraction
-        print("Step 3/5: Extracting Enhanced Citations...")
+        logger.debug("Step 3/5: Extracting Enhanced Citations...")
         enhanced_citations = self._extract_enhanced_citations(
             document_data,
             result['citation_snippet']
         )
         result['enhanced_citations'] = enhanced_citations
 
+        # Historical stats of the predicted category, used by steps 4 and 5
+        category_stats = self._get_category_stats(result['final_category'])
+
         # Step 4: Confidence Calibration
-        print("Step 4/5: Applying Confidence Calibration...")
+        logger.debug("Step 4/5: Applying Confidence Calibration...")
         calibrated_confidence = self._calibrate_confidence(
             result['confidence_score'],
             result['final_category'],
-            result.get('validation_consensus', False)
+            result.get('validation_consensus', False),
+            category_stats
         )
         result['original_confidence'] = result['confidence_score']
         result['confidence_score'] = calibrated_confidence
 
         # Step 5: HITL Decision with Enhanced Logic
-        print("Step 5/5: Enhanced HITL Decision Logic...")
-        hitl_decision = self._enhanced_hitl_decision(result, safety_result)
+        logger.debug("Step 5/5: Enhanced HITL Decision Logic...")
+        hitl_decision = self._enhanced_hitl_decision(result, safety_result, category_stats)
         result['hitl_status'] = hitl_decision['status']
         result['hitl_reasoning'] = hitl_decision['reasoning']
         result['auto_approval_probability'] = hitl_decision['auto_approval_probability']
@@ -147,19 +167,49 @@ class EnhancedGeminiClassifier:
                 document_id
             )
 
-        # Print summary
-        print(f"\n{'='*80}")
-        print(f"CLASSIFICATION COMPLETE")
-        print(f"{'='*80}")
-        print(f"Category: {result['final_category']}")
-        print(f"Confidence: {result['confidence_score']:.1%} (calibrated from {result['original_confidence']:.1%})")
-        print(f"HITL Status: {result['hitl_status']}")
-        print(f"Child Safe: {'Yes' if result['child_safe'] else 'No'}")
-        print(f"Processing Time: {result['processing_time']:.2f}s")
-        print(f"{'='*80}\n")
+        logger.info(
+            "Classified %s: %s, confidence %.1f%% (calibrated from %.1f%%), HITL %s, child safe %s, %.2fs",
+            document_id, result['final_category'], result['confidence_score'] * 100,
+            result['original_confidence'] * 100, result['hitl_status'], result['child_safe'],
+            result['processing_time']
+        )
 
         return result
 
+    def classify_batch(self, documents: List[Dict], ground_truths: Optional[List[Optional[str]]] = None,
+                       max_concurrency: Optional[int] = None) -> List[Dict]:
+        """
+        Classify several documents concurrently
+
+        Each document goes through classify(); the work is waiting on Gemini,
+        so up to max_concurrency documents run in threads at once.
+
+        Args:
+            documents: Processed document data for each document
+            ground_truths: Optional ground truth per document, for accuracy tracking
+            max_concurrency: Documents classified at once (at most BATCH_CONCURRENCY, the default)
+
+        Returns:
+            Enhanced classification results, in the same order as the input
+        """
+        if not documents:
+            return []
+        if ground_truths is None:
+            ground_truths = [None] * len(documents)
+
+        # The safety pattern layer scans the whole batch at once
+        pattern_results = self.safety_validator.scan_batch([d['full_text'] for d in documents])
+
+        # Submission blocks while max_concurrency documents are in flight
+        slots = threading.Semaphore(max_concurrency or self.BATCH_CONCURRENCY)
+        futures = []
+        for document_data, ground_truth, patterns in zip(documents, ground_truths, pattern_results):
+            slots.acquire()
+            future = self._batch_executor.submit(self.classify, document_data, ground_truth, patterns)
+            future.add_done_callback(lambda _: slots.release())
+            futures.append(future)
+        return [future.result() for future in futures]
+
     def _extract_enhanced_citations(self, document_data: Dict, citation_text: str) -> Dict:
         """
         Extract enhanced citations with exact page, line, and region mapping
@@ -199,8 +249,12 @@ class EnhancedGeminiClassifier:
 
         return citations
 
+    def _get_category_stats(self, category: str) -> Dict:
+        """Tracked stats of a category (without adding it to the tracker)"""
+        return self.accuracy_tracker.metrics['category_stats'].get(category, _NO_STATS)
+
     def _calibrate_confidence(self, raw_confidence: float, category: str,
-                             has_consensus: bool) -> float:
+                             has_consensus: bool, category_stats: Optional[Dict] = None) -> float:
         """
         Calibrate confidence score based on historical accuracy
 
@@ -208,12 +262,14 @@ class EnhancedGeminiClassifier:
             raw_confidence: Raw confidence from model
             category: Predicted category
             has_consensus: Whether dual validation reached consensus
+            category_stats: Stats of the category, if already looked up
 
         Returns:
             Calibrated confidence score
         """
         # Get category-specific metrics
-        category_stats = self.accuracy_tracker.metrics['category_stats'].get(category, {})
+        if category_stats is None:
+            category_stats = self._get_category_stats(category)
         precision = category_stats.get('precision', 0.5)
 
         # Calibration formula
@@ -229,11 +285,16 @@ class EnhancedGeminiClassifier:
 
         return round(calibrated, 4)
 
-    def _enhanced_hitl_decision(self, classification_result: Dict,
-                                safety_result: Dict) -> Dict:
+    def _enhanced_hitl_decision(self, classification_result: Dict, safety_result: Dict,
+                                category_stats: Optional[Dict] = None) -> Dict:
         """
         Enhanced HITL decision logic to maximize auto-approval rate
 
+        Args:
+            classification_result: Calibrated classification result
+            safety_result: Result of the content safety validation
+            category_stats: Stats of the predicted category, if already looked up
+
         Returns:
             HITL decision with status and reasoning
         """
@@ -257,7 +318,8 @@ class EnhancedGeminiClassifier:
             auto_approval_score += 0.3
 
         # Factor 3: Category historical accuracy (20% weight)
-        category_stats = self.accuracy_tracker.metrics['category_stats'].get(category, {})
+        if category_stats is None:
+            category_stats = self._get_category_stats(category)
         precision = category_stats.get('precision', 0.0)
         if precision >= 0.95:
             auto_approval_score += 0.2
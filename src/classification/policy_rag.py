@@ -2,53 +2,164 @@
 Policy RAG (Retrieval Augmented Generation) Setup
 Manages Gemini File Search Store for policy knowledge base
 """
-import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional
 import google.generativeai as genai
+import orjson
 from google.ai.generativelanguage_v1beta.types import File
 
 from ..config import Config
+from ..gemini_client import configure_gemini
+
+# Section separator for the compiled policy document
+SEP = "=" * 80
+
+
+def _section_header(title: str) -> str:
+    """Banner that opens a section of the compiled policy document"""
+    return f"\n{SEP}\n{title}\n{SEP}\n\n"
+
+
+# Fixed text of the compiled policy document, built once at import
+_DOCUMENT_BANNER = (
+    f"{SEP}\n"
+    "ENTERPRISE DOCUMENT CLASSIFICATION POLICY\n"
+    f"{SEP}\n"
+    "\n"
+    "This document contains the complete policy definitions, PII patterns,\n"
+    "and validated examples for the document classification system.\n"
+    "\n"
+)
+_CATEGORIES_HEADER = _section_header("SECTION 1: CATEGORY DEFINITIONS")
+_DECISION_TREE_HEADER = _section_header("CLASSIFICATION DECISION TREE")
+_PII_HEADER = _section_header("SECTION 2: PII DETECTION PATTERNS")
+_EXAMPLES_HEADER = (
+    _section_header("SECTION 3: VALIDATED CLASSIFICATION EXAMPLES")
+    + "These are SME-validated examples demonstrating correct classification:\n\n"
+)
+
+
+def _read_json(path: Path):
+    """Read and parse a JSON file"""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
 
 
 class PolicyRAG:
     """Manages the policy knowledge base using Gemini File Search"""
 
-    def __init__(self):
-        """Initialize Policy RAG system"""
-        genai.configure(api_key=Config.GEMINI_API_KEY)
+    # Policy files the compiled document is built from, by load_policies() key
+    POLICY_FILES = (
+        ("categories", "categories.json"),
+        ("pii_patterns", "pii_patterns.json"),
+        ("few_shot_examples", "few_shot_examples.json"),
+    )
+
+    # HITL examples not yet folded into few_shot_examples.json, one JSON object per line
+    EXAMPLES_SIDECAR = "few_shot_examples.jsonl"
+
+    # How flush() publishes new HITL examples: 'update' appends them to the
+    # compiled document, 'regenerate' rebuilds it from the policy files
+    REFRESH_STRATEGIES = ("update", "regenerate")
+
+    # File processing poll interval: starts at UPLOAD_POLL_INITIAL seconds and
+    # doubles up to UPLOAD_POLL_MAX
+    UPLOAD_POLL_INITIAL = 0.25
+    UPLOAD_POLL_MAX = 2.0
+
+    def __init__(self, refresh_strategy: str = "update"):
+        """
+        Initialize Policy RAG system
+
+        Args:
+            refresh_strategy: 'update' or 'regenerate' (see REFRESH_STRATEGIES)
+        """
+        if refresh_strategy not in self.REFRESH_STRATEGIES:
+            raise ValueError(f"Unknown refresh strategy: {refresh_strategy}")
+        configure_gemini()
         self.policy_dir = Config.POLICY_DIR
         self.uploaded_files = []
         self.corpus_id = None
 
+        # Prompt policy context, built from the policy files on first use
+        self._policy_context: Optional[str] = None
+
+        # Parsed policies and compiled document, reused while the policy
+        # files keep the same stat key (see _policy_files_key)
+        self._policies: Optional[Dict] = None
+        self._policies_key: Optional[tuple] = None
+        self._compiled_key: Optional[tuple] = None
+        # Number of few-shot examples in the compiled document (None if it has no examples section)
+        self._compiled_examples: Optional[int] = None
+
+        # Few-shot examples held in memory once read. New HITL examples are
+        # appended to the few_shot_examples.jsonl sidecar and folded into the
+        # canonical JSON by flush()
+        self.refresh_strategy = refresh_strategy
+        self._examples_data: Optional[Dict] = None
+        self._pending_examples: List[Dict] = []
+        self._examples_lock = threading.Lock()
+
+        # Reads the policy files concurrently in load_policies()
+        self._load_executor = ThreadPoolExecutor(max_workers=len(self.POLICY_FILES),
+                                                 thread_name_prefix="policy-load")
+
+        # Pending debounced re-upload (see _schedule_flush)
+        self._flush_timer: Optional[threading.Timer] = None
+
+    def _policy_files_key(self) -> tuple:
+        """
+        Build a cache key from the policy files' modification time and size
+
+        Returns:
+            Tuple of (path, st_mtime_ns, st_size) per policy file, then the
+            examples sidecar; missing files contribute (path, None, None)
+        """
+        key = []
+        for name in [name for _, name in self.POLICY_FILES] + [self.EXAMPLES_SIDECAR]:
+            path = self.policy_dir / name
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                key.append((str(path), None, None))
+            else:
+                key.append((str(path), st.st_mtime_ns, st.st_size))
+        return tuple(key)
+
     def load_policies(self) -> Dict:
         """
         Load all policy files
 
         Returns:
-            Dict containing all policy data
+            Dict containing all policy data (shared between calls while the
+            files are unchanged; do not mutate)
         """
-        policies = {}
-
-        # Load categories
-        categories_path = self.policy_dir / "categories.json"
-        if categories_path.exists():
-            with open(categories_path, 'r') as f:
-                policies['categories'] = json.load(f)
-
-        # Load PII patterns
-        pii_path = self.policy_dir / "pii_patterns.json"
-        if pii_path.exists():
-            with open(pii_path, 'r') as f:
-                policies['pii_patterns'] = json.load(f)
-
-        # Load few-shot examples
-        examples_path = self.policy_dir / "few_shot_examples.json"
-        if examples_path.exists():
-            with open(examples_path, 'r') as f:
-                policies['few_shot_examples'] = json.load(f)
-
+        key = self._policy_files_key()
+        if self._policies is not None and key == self._policies_key:
+            return self._policies
+
+        # Read the existing files in parallel; the stat key already says which exist
+        futures = {
+            policy_key: self._load_executor.submit(_read_json, self.policy_dir / name)
+            for (policy_key, name), (_, mtime, _) in zip(self.POLICY_FILES, key)
+            if mtime is not None
+        }
+        policies = {policy_key: future.result() for policy_key, future in futures.items()}
+
+        # Include HITL examples that are still only in the sidecar
+        pending = self._read_sidecar()
+        if pending:
+            examples = policies.get('few_shot_examples', {})
+            policies['few_shot_examples'] = {
+                **examples,
+                'few_shot_examples': examples.get('few_shot_examples', []) + pending
+            }
+
+        self._policies = policies
+        self._policies_key = key
         return policies
 
     def create_policy_document(self) -> str:
@@ -58,117 +169,112 @@ class PolicyRAG:
         Returns:
             Path to the generated policy document
         """
-        policies = self.load_policies()
+        policy_doc_path = self.policy_dir / "compiled_policy.txt"
 
-        # Create comprehensive policy text
-        policy_text_parts = [
-            "=" * 80,
-            "ENTERPRISE DOCUMENT CLASSIFICATION POLICY",
-            "=" * 80,
-            "",
-            "This document contains the complete policy definitions, PII patterns,",
-            "and validated examples for the document classification system.",
-            "",
-        ]
+        # Reuse the compiled document while the policy files are unchanged
+        key = self._policy_files_key()
+        if key == self._compiled_key and policy_doc_path.exists():
+            return str(policy_doc_path)
 
-        # Add category definitions
-        if 'categories' in policies:
-            policy_text_parts.append("\n" + "=" * 80)
-            policy_text_parts.append("SECTION 1: CATEGORY DEFINITIONS")
-            policy_text_parts.append("=" * 80 + "\n")
-
-            for category in policies['categories']['categories']:
-                policy_text_parts.append(f"\n### {category['name']} (Priority: {category['priority']})")
-                policy_text_parts.append(f"\nDescription: {category['description']}")
-                policy_text_parts.append(f"\nCriteria:")
-                for criterion in category['criteria']:
-                    policy_text_parts.append(f"  - {criterion}")
-
-                if 'pii_indicators' in category:
-                    policy_text_parts.append(f"\nPII Indicators:")
-                    for pii in category['pii_indicators']:
-                        policy_text_parts.append(f"  - {pii}")
-
-                policy_text_parts.append(f"\nExamples:")
-                for example in category['examples']:
-                    policy_text_parts.append(f"  - {example}")
-
-                if 'action' in category:
-                    policy_text_parts.append(f"\nRequired Action: {category['action']}")
-
-                policy_text_parts.append("")
-
-            # Add decision tree
-            if 'decision_tree' in policies['categories']:
-                policy_text_parts.append("\n" + "=" * 80)
-                policy_text_parts.append("CLASSIFICATION DECISION TREE")
-                policy_text_parts.append("=" * 80 + "\n")
-                policy_text_parts.append(policies['categories']['decision_tree']['description'])
-                policy_text_parts.append("")
-
-                for step in policies['categories']['decision_tree']['steps']:
-                    policy_text_parts.append(f"\nStep {step['step']}: Check for {step['check']}")
-                    policy_text_parts.append(f"Question: {step['question']}")
-                    policy_text_parts.append(f"If YES: {step['if_yes']}")
-                    policy_text_parts.append(f"If NO: {step['if_no']}")
-
-        # Add PII patterns
-        if 'pii_patterns' in policies:
-            policy_text_parts.append("\n" + "=" * 80)
-            policy_text_parts.append("SECTION 2: PII DETECTION PATTERNS")
-            policy_text_parts.append("=" * 80 + "\n")
-
-            pii_data = policies['pii_patterns']['pii_patterns']
-
-            # High risk PII
-            policy_text_parts.append("\n### HIGH RISK PII (CONFIDENTIAL)")
-            policy_text_parts.append(f"Description: {pii_data['high_risk']['description']}\n")
-            for pattern in pii_data['high_risk']['patterns']:
-                policy_text_parts.append(f"- {pattern['name']}: {pattern['severity']}")
-                policy_text_parts.append(f"  Examples: {', '.join(pattern['examples'])}")
-
-            # Medium risk PII
-            policy_text_parts.append("\n### MEDIUM RISK PII (SENSITIVE)")
-            policy_text_parts.append(f"Description: {pii_data['medium_risk']['description']}\n")
-            for pattern in pii_data['medium_risk']['patterns']:
-                policy_text_parts.append(f"- {pattern['name']}: {pattern['severity']}")
-                policy_text_parts.append(f"  Examples: {', '.join(pattern['examples'])}")
-
-            # Financial indicators
-            policy_text_parts.append("\n### FINANCIAL/CONFIDENTIAL INDICATORS")
-            policy_text_parts.append("Keywords indicating financial or confidential content:")
-            for keyword in pii_data['financial_indicators']['keywords']:
-                policy_text_parts.append(f"  - {keyword}")
-
-            # Technical indicators
-            policy_text_parts.append("\n### TECHNICAL/CONFIDENTIAL INDICATORS")
-            policy_text_parts.append("Keywords indicating technical or confidential content:")
-            for keyword in pii_data['technical_indicators']['keywords']:
-                policy_text_parts.append(f"  - {keyword}")
-
-        # Add few-shot examples
-        if 'few_shot_examples' in policies:
-            policy_text_parts.append("\n" + "=" * 80)
-            policy_text_parts.append("SECTION 3: VALIDATED CLASSIFICATION EXAMPLES")
-            policy_text_parts.append("=" * 80 + "\n")
-            policy_text_parts.append("These are SME-validated examples demonstrating correct classification:\n")
-
-            for idx, example in enumerate(policies['few_shot_examples']['few_shot_examples'], 1):
-                policy_text_parts.append(f"\n### Example {idx}: {example['document_type']}")
-                policy_text_parts.append(f"Content: {example['content_snippet']}")
-                policy_text_parts.append(f"Classification: {example['classification']}")
-                policy_text_parts.append(f"Confidence: {example['confidence']}")
-                policy_text_parts.append(f"Reasoning: {example['reasoning']}")
-                policy_text_parts.append(f"Citations: {example['citations']}")
-                policy_text_parts.append("")
-
-        # Save to file
-        policy_doc_path = self.policy_dir / "compiled_policy.txt"
-        with open(policy_doc_path, 'w') as f:
-            f.write("\n".join(policy_text_parts))
+        policies = self.load_policies()
+
+        with open(policy_doc_path, 'w', buffering=1 << 20) as f:
+            # Write the policy text section by section straight to the file
+            f.write(_DOCUMENT_BANNER)
+
+            # Add category definitions
+            if 'categories' in policies:
+                categories = policies['categories']
+                f.write(_CATEGORIES_HEADER)
+
+                for category in categories['categories']:
+                    f.write(f"\n### {category['name']} (Priority: {category['priority']})\n")
+                    f.write(f"\nDescription: {category['description']}\n")
+                    f.write(f"\nCriteria:\n")
+                    for criterion in category['criteria']:
+                        f.write(f"  - {criterion}\n")
+
+                    if 'pii_indicators' in category:
+                        f.write(f"\nPII Indicators:\n")
+                        for pii in category['pii_indicators']:
+                            f.write(f"  - {pii}\n")
+
+                    f.write(f"\nExamples:\n")
+                    for example in category['examples']:
+                        f.write(f"  - {example}\n")
+
+                    if 'action' in category:
+                        f.write(f"\nRequired Action: {category['action']}\n")
+
+                    f.write("\n")
+
+                # Add decision tree
+                if 'decision_tree' in categories:
+                    f.write(_DECISION_TREE_HEADER)
+                    f.write(categories['decision_tree']['description'])
+                    f.write("\n\n")
+
+                    for step in categories['decision_tree']['steps']:
+                        f.write(f"\nStep {step['step']}: Check for {step['check']}\n")
+                        f.write(f"Question: {step['question']}\n")
+                        f.write(f"If YES: {step['if_yes']}\n")
+                        f.write(f"If NO: {step['if_no']}\n")
+
+            # Add PII patterns
+            if 'pii_patterns' in policies:
+                f.write(_PII_HEADER)
+
+                pii_data = policies['pii_patterns']['pii_patterns']
+
+                # High risk PII
+                f.write("\n### HIGH RISK PII (CONFIDENTIAL)\n")
+                f.write(f"Description: {pii_data['high_risk']['description']}\n\n")
+                for pattern in pii_data['high_risk']['patterns']:
+                    f.write(f"- {pattern['name']}: {pattern['severity']}\n")
+                    f.write(f"  Examples: {', '.join(pattern['examples'])}\n")
+
+                # Medium risk PII
+                f.write("\n### MEDIUM RISK PII (SENSITIVE)\n")
+                f.write(f"Description: {pii_data['medium_risk']['description']}\n\n")
+                for pattern in pii_data['medium_risk']['patterns']:
+                    f.write(f"- {pattern['name']}: {pattern['severity']}\n")
+                    f.write(f"  Examples: {', '.join(pattern['examples'])}\n")
+
+                # Financial indicators
+                f.write("\n### FINANCIAL/CONFIDENTIAL INDICATORS\n")
+                f.write("Keywords indicating financial or confidential content:\n")
+                for keyword in pii_data['financial_indicators']['keywords']:
+                    f.write(f"  - {keyword}\n")
+
+                # Technical indicators
+                f.write("\n### TECHNICAL/CONFIDENTIAL INDICATORS\n")
+                f.write("Keywords indicating technical or confidential content:\n")
+                for keyword in pii_data['technical_indicators']['keywords']:
+                    f.write(f"  - {keyword}\n")
+
+            # Add few-shot examples
+            if 'few_shot_examples' in policies:
+                f.write(_EXAMPLES_HEADER)
+
+                for idx, example in enumerate(policies['few_shot_examples']['few_shot_examples'], 1):
+                    self._write_example(f, idx, example)
+        self._compiled_key = key
+        self._compiled_examples = (len(policies['few_shot_examples']['few_shot_examples'])
+                                   if 'few_shot_examples' in policies else None)
 
         return str(policy_doc_path)
 
+    @staticmethod
+    def _write_example(f, idx: int, example: Dict):
+        """Write one few-shot example section of the compiled policy document"""
+        f.write(f"\n### Example {idx}: {example['document_type']}\n")
+        f.write(f"Content: {example['content_snippet']}\n")
+        f.write(f"Classification: {example['classification']}\n")
+        f.write(f"Confidence: {example['confidence']}\n")
+        f.write(f"Reasoning: {example['reasoning']}\n")
+        f.write(f"Citations: {example['citations']}\n")
+        f.write("\n")
+
     def upload_policy_to_gemini(self) -> str:
         """
         Upload policy document to Gemini File API
@@ -176,6 +282,9 @@ class PolicyRAG:
         Returns:
             File URI for use in RAG queries
         """
+        # The policy files are being (re)published; rebuild the prompt context from them
+        self.invalidate_policy_cache()
+
         # Create compiled policy document
         policy_path = self.create_policy_document()
 
@@ -187,10 +296,12 @@ class PolicyRAG:
             display_name="Enterprise Classification Policy"
         )
 
-        # Wait for processing
+        # Wait for processing, polling quickly at first for small files
         print(f"Waiting for file processing...")
+        delay = self.UPLOAD_POLL_INITIAL
         while uploaded_file.state.name == "PROCESSING":
-            time.sleep(2)
+            time.sleep(delay)
+            delay = min(delay * 2, self.UPLOAD_POLL_MAX)
             uploaded_file = genai.get_file(uploaded_file.name)
 
         if uploaded_file.state.name == "FAILED":
@@ -201,6 +312,10 @@ class PolicyRAG:
 
         return uploaded_file.uri
 
+    def invalidate_policy_cache(self):
+        """Drop the cached policy context so the next prompt re-reads the policy files"""
+        self._policy_context = None
+
     def get_policy_context(self) -> str:
         """
         Get policy context for prompts
@@ -208,6 +323,12 @@ class PolicyRAG:
         Returns:
             Formatted policy context string
         """
+        if self._policy_context is None:
+            self._policy_context = self._build_policy_context()
+        return self._policy_context
+
+    def _build_policy_context(self) -> str:
+        """Build the policy context from the category definitions"""
         policies = self.load_policies()
 
         context_parts = [
@@ -230,11 +351,38 @@ class PolicyRAG:
 
         return "\n".join(context_parts)
 
+    def _load_examples(self) -> Dict:
+        """
+        Load the few-shot examples once, replaying any unflushed sidecar entries
+
+        Returns:
+            Parsed few_shot_examples.json data, kept in memory
+        """
+        if self._examples_data is None:
+            self._examples_data = _read_json(self.policy_dir / "few_shot_examples.json")
+
+            self._pending_examples = self._read_sidecar()
+            self._examples_data['few_shot_examples'].extend(self._pending_examples)
+        return self._examples_data
+
+    def _read_sidecar(self) -> List[Dict]:
+        """Read the HITL examples waiting in the sidecar"""
+        sidecar_path = self.policy_dir / self.EXAMPLES_SIDECAR
+        if not sidecar_path.exists():
+            return []
+        with open(sidecar_path, 'rb') as f:
+            return [orjson.loads(line) for line in f if line.strip()]
+
     def add_hitl_example(self, document_content: str, classification: str,
                         reasoning: str, citations: str, document_type: str = "HITL Validated"):
         """
         Add a new SME-validated example to the knowledge base
 
+        The example is appended to the few_shot_examples.jsonl sidecar; the
+        canonical JSON is rewritten and the policy re-uploaded once
+        Config.HITL_UPLOAD_BATCH examples are pending, after
+        Config.HITL_UPLOAD_DEBOUNCE seconds without a new example, or on flush().
+
         Args:
             document_content: Content snippet
             classification: Validated classification
@@ -242,13 +390,6 @@ class PolicyRAG:
             citations: Citation information
             document_type: Type of document
         """
-        examples_path = self.policy_dir / "few_shot_examples.json"
-
-        # Load existing examples
-        with open(examples_path, 'r') as f:
-            data = json.load(f)
-
-        # Add new example
         new_example = {
             'document_type': document_type,
             'content_snippet': document_content[:500],  # Limit length
@@ -258,33 +399,109 @@ class PolicyRAG:
             'citations': citations
         }
 
-        data['few_shot_examples'].append(new_example)
-
-        # Save updated examples
-        with open(examples_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        with self._examples_lock:
+            examples = self._load_examples()['few_shot_examples']
+            examples.append(new_example)
+            self._pending_examples.append(new_example)
+
+            # Append-only write of the new example
+            with open(self.policy_dir / self.EXAMPLES_SIDECAR, 'ab') as f:
+                f.write(orjson.dumps(new_example) + b'\n')
+
+            total = len(examples)
+            pending = len(self._pending_examples)
+
+        print(f"Added HITL example to knowledge base. Total examples: {total}")
+
+        if pending >= Config.HITL_UPLOAD_BATCH or Config.HITL_UPLOAD_DEBOUNCE <= 0:
+            self.flush()
+        else:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        """(Re)start the debounce timer so a burst of examples ends in one upload"""
+        with self._examples_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+            self._flush_timer = threading.Timer(Config.HITL_UPLOAD_DEBOUNCE, self._flush_upload)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _flush_upload(self):
+        """Debounce timer callback"""
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Error uploading HITL examples: {e}")
+
+    def flush(self) -> Optional[str]:
+        """
+        Write pending HITL examples to few_shot_examples.json and re-upload the policy
 
-        print(f"Added HITL example to knowledge base. Total examples: {len(data['few_shot_examples'])}")
+        Returns:
+            File URI of the uploaded policy, or None if nothing was pending
+        """
+        with self._examples_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+            # Loading the examples picks up any left in the sidecar by an earlier run
+            data = self._load_examples()
+            if not self._pending_examples:
+                return None
+
+            examples = data['few_shot_examples']
+            self._pending_examples = []
+
+            # The compiled document can be extended if only examples were added
+            # since it was built: the other policy files (every key entry but
+            # the examples file and its sidecar) are unchanged
+            policy_doc_path = self.policy_dir / "compiled_policy.txt"
+            appendable = (self.refresh_strategy == "update"
+                          and self._compiled_key is not None
+                          and self._compiled_key[:-2] == self._policy_files_key()[:-2]
+                          and self._compiled_examples is not None
+                          and self._compiled_examples <= len(examples)
+                          and policy_doc_path.exists())
+
+            self._write_examples(data)
+
+            # Update path: add the new examples to the end of the compiled
+            # document (section 3 is last) instead of rebuilding it
+            if appendable:
+                with open(policy_doc_path, 'a') as f:
+                    for idx, example in enumerate(examples[self._compiled_examples:],
+                                                  self._compiled_examples + 1):
+                        self._write_example(f, idx, example)
+                self._compiled_key = self._policy_files_key()
+                self._compiled_examples = len(examples)
 
         # Re-upload policy to update RAG
-        self.upload_policy_to_gemini()
+        return self.upload_policy_to_gemini()
+
+    def _write_examples(self, data: Dict):
+        """Rewrite few_shot_examples.json and empty the sidecar"""
+        with open(self.policy_dir / "few_shot_examples.json", 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        open(self.policy_dir / self.EXAMPLES_SIDECAR, 'w').close()
 
     def clear_ingested_documents(self):
         """
         Clear all HITL-validated examples from the knowledge base
         """
-        examples_path = self.policy_dir / "few_shot_examples.json"
-
-        # Load existing examples
-        with open(examples_path, 'r') as f:
-            data = json.load(f)
-
-        # Clear examples
-        data['few_shot_examples'] = []
-
-        # Save updated examples
-        with open(examples_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        with self._examples_lock:
+            data = self._load_examples()
+
+            # Clear examples, including any not yet flushed
+            data['few_shot_examples'] = []
+            self._pending_examples = []
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+            # Save updated examples
+            self._write_examples(data)
 
         print("Cleared all HITL examples from the knowledge base.")
 
@@ -2,9 +2,12 @@
 Configurable Prompt Library for Dynamic Prompt Tree Generation
 Allows SMEs to customize classification prompts without code changes
 """
-import json
 from pathlib import Path
-from typing import Dict, List
+from string import Formatter
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+
 from ..config import Config
 
 
@@ -24,11 +27,18 @@ class PromptLibrary:
         self.library_path = library_path
         self.prompts = self._load_prompts()
 
+        # Parsed templates by prompt name: (template, segments). The template
+        # is kept so an edited prompt is re-parsed on its next use
+        self._parsed: Dict[str, Tuple[str, Optional[List[Tuple[str, Optional[str]]]]]] = {}
+
+        # Sorted classification sequence; cleared whenever the prompts change
+        self._sequence_cache: Optional[List[Dict]] = None
+
     def _load_prompts(self) -> Dict:
         """Load prompts from configuration file"""
         if self.library_path.exists():
-            with open(self.library_path, 'r') as f:
-                return json.load(f)
+            with open(self.library_path, 'rb') as f:
+                return orjson.loads(f.read())
         else:
             # Create default prompt library
             default_prompts = self._get_default_prompts()
@@ -174,8 +184,8 @@ Suitable for public distribution.
 
     def _save_prompts(self, prompts: Dict):
         """Save prompts to file"""
-        with open(self.library_path, 'w') as f:
-            json.dump(prompts, f, indent=2)
+        with open(self.library_path, 'wb') as f:
+            f.write(orjson.dumps(prompts, option=orjson.OPT_INDENT_2))
 
     def get_prompt(self, prompt_name: str, **kwargs) -> str:
         """
@@ -197,13 +207,47 @@ Suitable for public distribution.
             raise ValueError(f"Prompt '{prompt_name}' is disabled")
 
         template = prompt_config['template']
+        segments = self._get_segments(prompt_name, template)
 
         # Format template with provided variables
         try:
-            return template.format(**kwargs)
+            if segments is None:
+                return template.format(**kwargs)
+            return "".join([
+                literal if field is None else literal + format(kwargs[field])
+                for literal, field in segments
+            ])
         except KeyError as e:
             raise ValueError(f"Missing required variable for prompt: {e}")
 
+    def _get_segments(self, prompt_name: str,
+                      template: str) -> Optional[List[Tuple[str, Optional[str]]]]:
+        """
+        Get the parsed form of a prompt template
+
+        Args:
+            prompt_name: Name of prompt template
+            template: Current template text for the prompt
+
+        Returns:
+            List of (literal_text, field_name) segments, or None if the
+            template uses format specs, conversions or indexed fields and
+            has to go through str.format
+        """
+        cached = self._parsed.get(prompt_name)
+        if cached is not None and cached[0] == template:
+            return cached[1]
+
+        segments = []
+        for literal, field, spec, conversion in Formatter().parse(template):
+            if field is not None and (spec or conversion or not field.isidentifier()):
+                segments = None
+                break
+            segments.append((literal, field))
+
+        self._parsed[prompt_name] = (template, segments)
+        return segments
+
     def get_prompt_temperature(self, prompt_name: str) -> float:
         """Get temperature setting for prompt"""
         return self.prompts['prompts'][prompt_name].get('temperature', 0.1)
@@ -213,8 +257,12 @@ Suitable for public distribution.
         Get ordered sequence of classification prompts
 
         Returns:
-            List of prompt configs sorted by priority
+            List of prompt configs sorted by priority (shared between calls
+            until the prompts change; do not mutate)
         """
+        if self._sequence_cache is not None:
+            return self._sequence_cache
+
         enabled_prompts = [
             {
                 'name': name,
@@ -227,7 +275,8 @@ Suitable for public distribution.
         ]
 
         # Sort by priority (lower number = higher priority)
-        return sorted(enabled_prompts, key=lambda x: x['priority'])
+        self._sequence_cache = sorted(enabled_prompts, key=lambda x: x['priority'])
+        return self._sequence_cache
 
     def add_custom_prompt(self, name: str, category: str, template: str,
                          priority: int, temperature: float = 0.1):
@@ -248,6 +297,7 @@ Suitable for public distribution.
             'temperature': temperature,
             'enabled': True
         }
+        self._sequence_cache = None
 
         self._save_prompts(self.prompts)
         print(f"Added custom prompt: {name} (category: {category}, priority: {priority})")
@@ -264,6 +314,7 @@ Suitable for public distribution.
             raise ValueError(f"Prompt '{name}' not found")
 
         self.prompts['prompts'][name].update(updates)
+        self._sequence_cache = None
         self._save_prompts(self.prompts)
         print(f"Updated prompt: {name}")
 
@@ -277,19 +328,20 @@ Suitable for public distribution.
 
     def export_library(self, output_path: Path):
         """Export current prompt library"""
-        with open(output_path, 'w') as f:
-            json.dump(self.prompts, f, indent=2)
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(self.prompts, option=orjson.OPT_INDENT_2))
         print(f"Prompt library exported to: {output_path}")
 
     def import_library(self, input_path: Path):
         """Import prompt library from file"""
-        with open(input_path, 'r') as f:
-            imported = json.load(f)
+        with open(input_path, 'rb') as f:
+            imported = orjson.loads(f.read())
 
         # Validate structure
         if 'prompts' not in imported:
             raise ValueError("Invalid prompt library format")
 
         self.prompts = imported
+        self._sequence_cache = None
         self._save_prompts(self.prompts)
         print(f"Prompt library imported from: {input_path}")
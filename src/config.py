@@ -15,15 +15,33 @@ class Config:
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
     SOLANA_CLUSTER_URL = os.getenv("SOLANA_CLUSTER_URL", "https://api.devnet.solana.com")
+    SOLANA_WS_URL = os.getenv(
+        "SOLANA_WS_URL",
+        SOLANA_CLUSTER_URL.replace("https://", "wss://", 1).replace("http://", "ws://", 1)
+    )
+    SOLANA_CONFIRM_TIMEOUT = float(os.getenv("SOLANA_CONFIRM_TIMEOUT", "30"))
 
     # Model Configuration
     GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
+    GEMINI_CONTEXT_TOKENS = int(os.getenv("GEMINI_CONTEXT_TOKENS", "12500"))  # Document tokens per chat prompt
     ELEVENLABS_MODEL = os.getenv("ELEVENLABS_MODEL", "flash_v2_5")
 
     # Processing Configuration
     MAX_PAGES = int(os.getenv("MAX_PAGES", "100"))
     CONFIDENCE_THRESHOLD = float(os.getenv("CONFIDENCE_THRESHOLD", "0.9"))
     DUAL_VALIDATION_ENABLED = os.getenv("DUAL_VALIDATION_ENABLED", "true").lower() == "true"
+    # Skip validation pass 2 when pass 1 confidence is at or beyond these bounds
+    DUAL_SKIP_ENABLED = os.getenv("DUAL_SKIP_ENABLED", "false").lower() == "true"
+    DUAL_SKIP_HIGH = float(os.getenv("DUAL_SKIP_HIGH", "0.97"))
+    DUAL_SKIP_LOW = float(os.getenv("DUAL_SKIP_LOW", "0.2"))
+    # Documents longer than CHUNK_THRESHOLD characters are checked in overlapping windows
+    CHUNK_THRESHOLD = int(os.getenv("CHUNK_THRESHOLD", "12000"))
+    CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "8000"))
+    CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "400"))
+    # Re-upload the policy once HITL_UPLOAD_BATCH new HITL examples are pending, or
+    # HITL_UPLOAD_DEBOUNCE seconds after the last one (0 = upload on every example)
+    HITL_UPLOAD_BATCH = int(os.getenv("HITL_UPLOAD_BATCH", "20"))
+    HITL_UPLOAD_DEBOUNCE = float(os.getenv("HITL_UPLOAD_DEBOUNCE", "5"))
 
     # Paths
     BASE_DIR = Path(__file__).parent.parent
@@ -0,0 +1,31 @@
+"""
+Shared Gemini client configuration
+"""
+import threading
+
+from .config import Config
+
+_configure_lock = threading.Lock()
+_configured = False
+
+
+def configure_gemini():
+    """
+    Configure google.generativeai once per process
+
+    genai.configure() drops the SDK's cached API clients, so calling it from
+    every component would throw away open connections (and their TLS
+    sessions) each time another component is created. All models share the
+    clients built by the first call instead.
+
+    Returns:
+        The configured google.generativeai module
+    """
+    global _configured
+    import google.generativeai as genai
+
+    with _configure_lock:
+        if not _configured:
+            genai.configure(api_key=Config.GEMINI_API_KEY)
+            _configured = True
+    return genai
@@ -5,7 +5,9 @@ Handles PDF parsing, OCR, image extraction, and citation mapping
 import io
 import base64
 import hashlib
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 import PyPDF2
@@ -110,15 +112,7 @@ class DocumentProcessor:
             page_text_parts = []
             for block_idx, block in enumerate(text_blocks):
                 if block['type'] == 0:  # Text block
-                    block_text = ""
-                    lines = []
-
-                    for line in block.get("lines", []):
-                        line_text = ""
-                        for span in line.get("spans", []):
-                            line_text += span.get("text", "")
-                        lines.append(line_text)
-                        block_text += line_text + " "
+                    block_text, lines = self._read_text_block(block)
 
                     if block_text.strip():
                         # Store with citation information
@@ -188,6 +182,84 @@ class DocumentProcessor:
         self.full_text = "\n\n".join(full_text_parts)
         doc.close()
 
+    @staticmethod
+    def _read_text_block(block: Dict) -> Tuple[str, List[str]]:
+        """
+        Join the spans of a PyMuPDF text block
+
+        Args:
+            block: Text block from page.get_text("dict")
+
+        Returns:
+            Tuple of (block text, list of line texts)
+        """
+        block_text = ""
+        lines = []
+
+        for line in block.get("lines", []):
+            line_text = ""
+            for span in line.get("spans", []):
+                line_text += span.get("text", "")
+            lines.append(line_text)
+            block_text += line_text + " "
+
+        return block_text, lines
+
+    def extract_text(self, max_workers: Optional[int] = None) -> str:
+        """
+        Extract only the document's full text (same content as process()['full_text'])
+
+        Skips metadata, citation mapping, base64 image export and cached-content
+        formatting. Image OCR, which runs tesseract in a subprocess, is spread over
+        a thread pool while page text is read.
+
+        Args:
+            max_workers: OCR threads (defaults to the CPU count)
+
+        Returns:
+            Full document text with page markers
+        """
+        doc = fitz.open(self.document_path)
+        page_texts = []
+        ocr_jobs = []
+
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            for page_num in range(len(doc)):
+                page = doc[page_num]
+
+                page_text_parts = []
+                for block in page.get_text("dict")["blocks"]:
+                    if block['type'] == 0:  # Text block
+                        block_text = self._read_text_block(block)[0].strip()
+                        if block_text:
+                            page_text_parts.append(block_text)
+                page_texts.append(page_text_parts)
+
+                for img_idx, img in enumerate(page.get_images()):
+                    try:
+                        image_bytes = doc.extract_image(img[0])["image"]
+                        future = executor.submit(pytesseract.image_to_string, Image.open(io.BytesIO(image_bytes)))
+                        ocr_jobs.append((page_num, img_idx, future))
+                    except Exception as e:
+                        print(f"Error processing image {img_idx} on page {page_num + 1}: {e}")
+
+            # OCR text follows the page's text blocks, in image order
+            for page_num, img_idx, future in ocr_jobs:
+                try:
+                    ocr_text = future.result().strip()
+                except Exception as e:
+                    print(f"Error processing image {img_idx} on page {page_num + 1}: {e}")
+                    continue
+                if ocr_text:
+                    page_texts[page_num].append(f"[IMAGE OCR]: {ocr_text}")
+
+        doc.close()
+
+        return "\n\n".join(
+            f"--- Page {page_num + 1} ---\n" + "\n".join(parts)
+            for page_num, parts in enumerate(page_texts)
+        )
+
     def _prepare_cached_content(self) -> str:
         """
         Prepare document content for Gemini caching
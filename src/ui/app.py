@@ -4,8 +4,13 @@ Provides upload interface and HITL review queue
 """
 import time
 import os
+import uuid
+import atexit
+import logging
+import logging.handlers
+import queue
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, send_file, url_for
+from flask import Flask, Response, render_template, request, jsonify, send_file, url_for
 from werkzeug.utils import secure_filename
 from flask_cors import CORS
 import shutil
@@ -18,6 +23,15 @@ from ..audit_logger import AuditLogger
 from ..chat_service import DocumentChatService
 
 
+# Log records are queued and written by a background thread, so request
+# threads never wait on the stdout lock
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+logging.basicConfig(level=logging.INFO, format='%(message)s',
+                    handlers=[logging.handlers.QueueHandler(_log_queue)])
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 app = Flask(__name__,
            template_folder='../../templates',
            static_folder='../../static')
@@ -27,7 +41,10 @@ app.config['UPLOAD_FOLDER'] = Config.UPLOAD_DIR
 
 # Initialize components
 policy_rag = PolicyRAG()
+# Write and upload HITL examples still waiting on the debounce timer
+atexit.register(policy_rag.flush)
 classifier = EnhancedGeminiClassifier(policy_rag)
+atexit.register(classifier.accuracy_tracker.close)
 blockchain = SolanaAuditTrail()
 audit_logger = AuditLogger()
 chat_service = DocumentChatService()
@@ -107,6 +124,7 @@ def upload_file():
                 classification_result,
                 processing_time,
                 blockchain_record)
+            chat_service.invalidate_document(classification_result['document_id'])
             print("✓ Database logging complete")
         except Exception as e:
             print(f"✗ Database logging failed: {e}")
@@ -170,6 +188,7 @@ def clear_documents():
 
         # Clear audit logs
         audit_logger.clear_all_logs()
+        chat_service.clear_caches()
 
         return jsonify({'success': True, 'message': 'All ingested documents, uploaded files, and audit logs cleared.'}), 200
     except Exception as e:
@@ -221,6 +240,7 @@ def submit_hitl_review():
             reviewer_name,
             notes
         )
+        chat_service.invalidate_document(document_id)
 
         # Add to RAG knowledge base if correction was made
         if original['final_category'] != corrected_category:
@@ -263,7 +283,7 @@ def get_classifications():
     limit = request.args.get('limit', 100, type=int)
     offset = request.args.get('offset', 0, type=int)
 
-    classifications = audit_logger.get_all_classifications(limit, offset)
+    classifications = audit_logger.get_all_classifications(limit, offset, as_dicts=True)
     return jsonify(classifications)
 
 
@@ -306,6 +326,24 @@ def chat():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Handle chat queries, streaming the response text as it is generated"""
+    data = request.json
+    message = data.get('message')
+    document_id = data.get('document_id')
+    session_id = data.get('session_id') or str(uuid.uuid4())
+
+    if not message:
+        return jsonify({'error': 'Message is required'}), 400
+
+    return Response(
+        chat_service.chat_stream(message, session_id, document_id=document_id),
+        mimetype='text/plain',
+        headers={'X-Session-Id': session_id}
+    )
+
+
 @app.route('/api/chat/history/<session_id>')
 def get_chat_history(session_id):
     """Get chat history for a session"""